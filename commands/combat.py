@@ -7,7 +7,7 @@ from random import choice
 from evennia import CmdSet
 from evennia.utils import inherits_from
 from world.combat import CombatHandler
-from world.enums import CombatRange
+from world.enums import AttackType, CombatRange
 from .command import Command
 
 
@@ -47,10 +47,6 @@ class CombatCommand(Command):
 
         return True
 
-    def at_post_cmd(self):
-        if self.caller.combat:
-            self.caller.combat.update()
-
 
 class CmdInitiateCombat(CombatCommand):
     """Engage an opponent in combat."""
@@ -180,7 +176,8 @@ class CmdHit(CombatCommand):
             caller.msg(f"{target.get_display_name(caller)} is too far away.")
             return
 
-        combat.at_melee_attack(caller, target)
+        combat.queue_action(caller, AttackType.MELEE, target)
+        caller.msg(f"You ready an attack on {target.get_display_name(caller)}.")
 
 
 
@@ -208,7 +205,8 @@ class CmdShoot(CombatCommand):
         if not combat.rules.validate_weapon_attack(caller, target, caller.weapon):
             return
 
-        combat.at_ranged_attack(caller, target)
+        combat.queue_action(caller, AttackType.RANGED, target)
+        caller.msg(f"You take aim at {target.get_display_name(caller)}.")
 
 
 class CmdFlee(CombatCommand):
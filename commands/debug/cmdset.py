@@ -1,5 +1,5 @@
-from commands.debug.encounters import CmdDebugSpawnEncounter
-from commands.debug.overworld import CmdDebugEnterOverworld, CmdDebugOverworldTeleport
+from commands.debug.encounters import CmdDebugEncounterSweeper, CmdDebugSpawnEncounter
+from commands.debug.overworld import CmdDebugEnterOverworld, CmdDebugOverworldClearCache, CmdDebugOverworldRoomPool, CmdDebugOverworldTeleport
 from evennia import CmdSet
 
 
@@ -10,4 +10,7 @@ class DebugCmdSet(CmdSet):
     def at_cmdset_creation(self):
         self.add(CmdDebugEnterOverworld())
         self.add(CmdDebugOverworldTeleport())
+        self.add(CmdDebugOverworldClearCache())
+        self.add(CmdDebugOverworldRoomPool())
         self.add(CmdDebugSpawnEncounter())
+        self.add(CmdDebugEncounterSweeper())
@@ -1,5 +1,6 @@
 from commands.command import Command
 from world.encounters.data import ENCOUNTER_GOBLIN_SCOUTS
+from world.encounters.script import EncounterSweeperScript
 
 
 class CmdDebugSpawnEncounter(Command):
@@ -10,3 +11,17 @@ class CmdDebugSpawnEncounter(Command):
 
     def func(self):
         ENCOUNTER_GOBLIN_SCOUTS.spawn(location=self.caller.location, players=[self.caller])
+
+
+class CmdDebugEncounterSweeper(Command):
+    key = "debug__encounter_sweeper"
+
+    locks = "cmd:perm(Admin) or perm(Developer)"
+    help_category = "Debugging"
+
+    def func(self):
+        stats = EncounterSweeperScript.get().get_stats()
+        self.caller.msg(
+            f"Last sweep: {stats['checked']} encounter mobs checked, {stats['idle']} idle, "
+            f"{stats['deleted']} deleted. Deleted since reload: {stats['total_deleted']}"
+        )
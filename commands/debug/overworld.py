@@ -1,5 +1,6 @@
 from evennia import Command
 from world.overworld import Overworld
+from world.overworld.provider import OverworldMapProvider
 
 
 class CmdDebugEnterOverworld(Command):
@@ -36,3 +37,27 @@ class CmdDebugOverworldTeleport(Command):
 
         overworld = Overworld.get_instance()
         overworld.move_obj(caller, (x, y))
+
+
+class CmdDebugOverworldClearCache(Command):
+    key = "debug__overworld_clear_cache"
+
+    locks = "cmd:perm(Admin) or perm(Developer)"
+    help_category = "Debugging"
+
+    def func(self):
+        OverworldMapProvider.clear_cache()
+        self.caller.msg("Cleared the overworld room descs and area exits cache.")
+
+
+class CmdDebugOverworldRoomPool(Command):
+    key = "debug__overworld_room_pool"
+
+    locks = "cmd:perm(Admin) or perm(Developer)"
+    help_category = "Debugging"
+
+    def func(self):
+        stats = Overworld.get_instance().get_room_pool_stats()
+        self.caller.msg(
+            f"Unused rooms: {stats['size']}, hits: {stats['hits']}, misses: {stats['misses']}"
+        )
@@ -35,6 +35,13 @@ def at_server_start():
     from world.overworld import Overworld
     overworld = Overworld.get_instance()
     overworld.start()
+    overworld.refill_room_pool(force=True)
+
+    from world.overworld.provider import connect_cache_signals
+    connect_cache_signals()
+
+    from world.encounters.script import EncounterSweeperScript
+    EncounterSweeperScript.get()
 
 def at_server_stop():
     """
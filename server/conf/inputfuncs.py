@@ -8,19 +8,16 @@ create your own as needed.
 
 
 def get_map(session, *args, **kwargs):
-    """Custom inputfunc to request the character's visible map."""
-    mapstr = None
-    if (obj := session.puppet) and obj.location:
-        # this is where you fetch the map string for the character and their location
-        # e.g. mapstr = obj.location.get_map(obj)
-        pass
-
-    if not mapstr:
-        # no valid map so just don't do anything
-        return
-
-    # send the message
-    session.msg(map=mapstr)
+    """
+    Custom inputfunc to request the character's visible map.
+
+    Clients which can apply `map_delta` commands send `delta=True`, the others
+    only ever get complete maps.
+    """
+    if (obj := session.puppet) and obj.location and hasattr(obj, "send_map"):
+        obj.ndb.map_deltas = bool(kwargs.get("delta"))
+        # the client lost track of its map, resync it with a full frame
+        obj.send_map(full=True)
 
 
 def get_channels(session, *args, **kwargs):
@@ -33,7 +33,8 @@ def in_range(accessing_obj, accessed_obj, *args, **kwargs):
     if hasattr(accessing_obj, 'nattributes'):
         if not (combat := accessing_obj.ndb.combat):
             return False
-        return combat.any_in_range(accessing_obj, range)
+        # the fight may have been merged into another one
+        return combat.find().any_in_range(accessing_obj, range)
     else:
         return false
 
@@ -101,6 +101,20 @@ class WebSocketClient(BaseWSClient):
         # send to client on required form [cmdname, args, kwargs]
         self.sendLine(json.dumps(["map", args, kwargs]))
 
+    def send_map_delta(self, *args, **kwargs):
+        """
+        Sends the changes to apply to the map already displayed by the client,
+        see `OverworldRoom.get_map_delta` for the format. Only the symbols that
+        scrolled into view are converted to HTML.
+        """
+        kwargs.pop("options", None)
+        kwargs["rows"] = [parse_html(row) for row in kwargs.get("rows", ())]
+        kwargs["cols"] = [parse_html(col) for col in kwargs.get("cols", ())]
+        kwargs["cells"] = [[x, y, parse_html(symbol)] for x, y, symbol in kwargs.get("cells", ())]
+
+        # send to client on required form [cmdname, args, kwargs]
+        self.sendLine(json.dumps(["map_delta", args, kwargs]))
+
     def data_in(self, **kwargs):
         if kwargs.get("ping"):
             # this is just a keepalive for the protocol...
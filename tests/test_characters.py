@@ -3,6 +3,8 @@ Test characters.
 
 """
 
+from unittest.mock import MagicMock, patch
+
 from evennia.utils import create
 from evennia.utils.test_resources import EvenniaTest
 
@@ -38,3 +40,21 @@ class TestCharacters(EvenniaTest):
         result = self.char1.at_pay(100)
         self.assertEqual(result, 40)
         self.assertEqual(self.char1.coins, 0)
+
+    def test_send_map(self):
+        location = MagicMock()
+        location.get_map_display.return_value = "map"
+        location.get_map_delta.return_value = ((1, 1), {"shift": [1, 0]})
+        self.char1.ndb.map_origin = (0, 1)
+
+        with patch.object(type(self.char1), "location", location), patch.object(self.char1, "msg") as msg:
+            # clients which didn't ask for deltas always get the whole map
+            self.char1.send_map()
+            msg.assert_called_once_with(map="map")
+            self.assertIsNone(self.char1.ndb.map_origin)
+
+            msg.reset_mock()
+            self.char1.ndb.map_deltas = True
+            self.char1.ndb.map_origin = (0, 1)
+            self.char1.send_map()
+            msg.assert_called_once_with(map_delta=((), {"shift": [1, 0]}))
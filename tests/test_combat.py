@@ -3,14 +3,38 @@ Test Ainneve's custom commands.
 
 """
 
+import os
+from tempfile import TemporaryDirectory
+from unittest.mock import MagicMock, patch
+
 from commands import combat
 from evennia.utils.create import create_object
-from evennia.utils.test_resources import EvenniaTest, EvenniaCommandTest
-from world.combat import CombatHandler
-from world.enums import CombatRange
+from evennia.utils.test_resources import BaseEvenniaTestCase, EvenniaTest, EvenniaCommandTest
+from world.combat import CombatHandler, CombatScheduler, combat_scheduler
+from world.combat_headless import (
+    HeadlessCombatHandler,
+    HeadlessFighter,
+    HeadlessWeapon,
+    NullLocation,
+    benchmark_attacks,
+    benchmark_merges,
+    benchmark_planning,
+    create_headless_combat,
+    replay,
+)
+from world.combat_log import CombatEventLog
+from world.enums import AttackType, CombatEvent, CombatMove, CombatRange
+from world.rng import RandomStream, seed_streams
+from world.rules import DiceRollEngine
+from typeclasses.mobs.mob import BaseMob
 from .mixins import AinneveTestMixin
 
 
+class _ListeningMob(BaseMob):
+    def at_msg_receive(self, text=None, from_obj=None, **kwargs):
+        return super().at_msg_receive(text=text, from_obj=from_obj, **kwargs)
+
+
 class TestCombatHandler(AinneveTestMixin, EvenniaTest):
     def setUp(self):
         super().setUp()
@@ -19,7 +43,6 @@ class TestCombatHandler(AinneveTestMixin, EvenniaTest):
         self.combat.positions[self.char2] = 2
 
     def test_add_remove(self):
-        from typeclasses.mobs.mob import BaseMob
         target = create_object(BaseMob, key="rat", location=self.room1)
         self.combat.add(target)
         self.assertTrue(target in self.combat.positions)
@@ -60,11 +83,26 @@ class TestCombatHandler(AinneveTestMixin, EvenniaTest):
         self.combat.positions[self.char2] = 5
         self.assertEqual(self.combat.get_range(self.char1, self.char2), CombatRange.MEDIUM)
 
+    def test_npc_weapon_invalidates_stats(self):
+        from typeclasses.npcs import NPC
+        npc = create_object(NPC, key="guard", location=self.room1)
+        self.combat.add(npc)
+        self.combat.get_stats(npc)
+
+        npc.weapon = self.weapon
+        self.assertNotIn(npc, self.combat.stats)
+        self.assertIs(self.combat.get_stats(npc).weapon, self.weapon)
+        npc.delete()
+
+    def test_walk_away(self):
+        self.char1.move_to(self.room2)
+        self.assertIsNone(self.char1.combat)
+        self.assertIsNone(self.char2.combat)
+
 
 class TestCombatCommands(AinneveTestMixin, EvenniaCommandTest):
     def setUp(self):
         super().setUp()
-        from typeclasses.mobs.mob import BaseMob
         self.target = create_object(BaseMob, key="rat", location=self.room1)
 
     def tearDown(self):
@@ -103,8 +141,7 @@ class TestCombatCommands(AinneveTestMixin, EvenniaCommandTest):
         self.call(
             combat.CmdHit(),
             "rat",
-            # TODO Patch a guaranteed hit
-            #"You hit rat with your fists",
+            "You ready an attack on rat.",
         )
         self.char1.cooldowns.clear()
 
@@ -116,8 +153,7 @@ class TestCombatCommands(AinneveTestMixin, EvenniaCommandTest):
         self.call(
             combat.CmdShoot(),
             "rat",
-            # TODO Patch a guaranteed hit
-            #"You shoot rat with your weapon",
+            "You take aim at rat.",
         )
         self.char1.cooldowns.clear()
 
@@ -131,3 +167,345 @@ class TestCombatCommands(AinneveTestMixin, EvenniaCommandTest):
         self.assertFalse(self.char1.combat)
         self.assertFalse(self.target.combat)
         self.assertEqual(self.char1.location, self.room2)
+
+
+class TestCombatMessages(AinneveTestMixin, EvenniaTest):
+    def setUp(self):
+        super().setUp()
+        self.rat = create_object(BaseMob, key="rat", location=self.room1)
+        self.owl = create_object(_ListeningMob, key="owl", location=self.room1)
+
+    def tearDown(self):
+        combat_scheduler.messages.flush()
+        self.rat.delete()
+        self.owl.delete()
+        super().tearDown()
+
+    def test_coalesced(self):
+        # only char1 and char2 have an account
+        with patch.object(type(self.char1), "has_account", True), patch.object(self.char1, "msg") as msg, \
+                patch.object(self.rat, "msg") as rat_msg, patch.object(self.owl, "msg") as owl_msg:
+            combat_scheduler.messages.buffering = True
+            self.room1.msg_contents("$You() $conj(hit) {target}.", mapping={"target": self.char2}, from_obj=self.char1)
+            self.room1.msg_contents("$You() $conj(dodge) the attack.", from_obj=self.char2)
+            msg.assert_not_called()
+            # NPCs with message hooks don't wait for the end of the tick, the others get nothing
+            self.assertEqual(owl_msg.call_count, 2)
+            rat_msg.assert_not_called()
+
+            combat_scheduler.messages.flush()
+
+        msg.assert_called_once()
+        text, options = msg.call_args.kwargs["text"]
+        self.assertEqual(text, f"You hit {self.char2.key}.\n{self.char2.key} dodges the attack.")
+        self.assertEqual(options, {"type": "combat"})
+        self.assertEqual(owl_msg.call_count, 2)
+        rat_msg.assert_not_called()
+        self.assertFalse(combat_scheduler.messages.buffering)
+
+    def test_unbuffered_order(self):
+        with patch.object(type(self.char1), "has_account", True), patch.object(self.char1, "msg") as msg:
+            combat_scheduler.messages.buffering = True
+            self.room1.msg_contents("$You() $conj(hit) the rat.", from_obj=self.char2)
+            # messages with options are sent after what came before them
+            self.room1.msg_contents(("The rat squeaks.", {"type": "say"}))
+            self.assertEqual(msg.call_count, 2)
+            self.assertEqual(msg.call_args_list[0].kwargs["text"][0], f"{self.char2.key} hits the rat.")
+            self.assertEqual(msg.call_args_list[1].kwargs["text"][0], "The rat squeaks.")
+
+            combat_scheduler.messages.flush()
+        self.assertEqual(msg.call_count, 2)
+
+
+class TestHeadlessCombat(BaseEvenniaTestCase):
+    def test_attacks(self):
+        for attack_type in (AttackType.MELEE, AttackType.RANGED, AttackType.THROWN):
+            combat, (attacker, target) = create_headless_combat(attack_type=attack_type)
+            attack = {
+                AttackType.MELEE: combat.at_melee_attack,
+                AttackType.RANGED: combat.at_ranged_attack,
+                AttackType.THROWN: combat.at_thrown_attack,
+            }[attack_type]
+            for _ in range(20):
+                attack(attacker, target)
+            self.assertLess(attacker.stamina, attacker.stamina_max)
+            self.assertEqual(attacker.location.messages, 20)
+
+    def test_stats_snapshot(self):
+        combat, (attacker, target) = create_headless_combat(shields=False)
+        self.assertEqual(combat.get_stats(attacker).strength, 1)
+        attacker.strength = 5
+        self.assertEqual(combat.get_stats(attacker).strength, 1)
+        combat.invalidate_stats(attacker)
+        self.assertEqual(combat.get_stats(attacker).strength, 5)
+
+        combat.remove(attacker)
+        self.assertFalse(combat.stats)
+
+    def test_range_queries(self):
+        combat, (first, second, third, fourth) = create_headless_combat(fighters=4)
+        for position, fighter in enumerate((first, second, third, fourth)):
+            combat.positions[fighter] = position * 2
+
+        self.assertEqual(combat.get_range(first, third), CombatRange.MEDIUM)
+        self.assertEqual(combat.get_range(first, fourth), CombatRange.RANGED)
+        self.assertEqual(combat.enemies_in_range(second, CombatRange.REACH), [first, third])
+        self.assertEqual(combat.nearest_enemy(fourth), third)
+        self.assertFalse(combat.any_in_range(first, CombatRange.MELEE))
+        self.assertTrue(combat.any_in_range(first, CombatRange.REACH))
+
+        combat.approach(fourth, third)
+        self.assertEqual(combat.positions.within(5, 0), [fourth])
+
+    def test_merge(self):
+        big, (first, second, third) = create_headless_combat(fighters=3)
+        small = HeadlessCombatHandler(HeadlessFighter("fourth"), HeadlessFighter("fifth"))
+        fourth = next(iter(small.positions))
+
+        # the smaller fight joins the larger one, whichever side starts it
+        self.assertIs(HeadlessCombatHandler.get_or_create(fourth, first), big)
+        self.assertIs(small.parent, big)
+        self.assertIs(fourth.combat, big)
+        self.assertEqual(len(big.positions), 5)
+        self.assertFalse(small.positions)
+
+    def test_benchmark_merges(self):
+        self.assertGreater(benchmark_merges(fighters=50, seed=1)["merges_per_second"], 0)
+
+    def test_defeat(self):
+        combat, (attacker, target) = create_headless_combat(shields=False, hp=1)
+        target.at_damage(1)
+        self.assertIsNone(attacker.combat)
+        self.assertFalse(combat.positions)
+
+    def test_scheduler(self):
+        combat, (attacker, target) = create_headless_combat(shields=False)
+        for _ in range(5):
+            combat.queue_action(attacker, AttackType.MELEE, target)
+        combat.queue_action(target, AttackType.MELEE, attacker)
+        self.assertEqual(len(combat.scheduler.pending[combat]), 2)
+
+        combat.scheduler.tick()
+        # spamming only resolved a single attack
+        self.assertEqual(attacker.location.messages, 2)
+        self.assertFalse(combat.scheduler.pending)
+
+        # the attack cooldown is checked again when resolving
+        combat.queue_action(attacker, AttackType.MELEE, target)
+        combat.scheduler.tick()
+        self.assertEqual(attacker.location.messages, 2)
+
+    def test_scheduler_error(self):
+        broken, (first, second) = create_headless_combat(shields=False)
+        combat, (attacker, target) = create_headless_combat(shields=False)
+        first.is_pc = second.is_pc = attacker.is_pc = target.is_pc = True
+        broken.queue_action(first, AttackType.MELEE, second)
+        combat.queue_action(attacker, AttackType.MELEE, target)
+
+        # resolving the broken fight raises
+        first.cooldowns = None
+        with patch("world.combat._log_trace") as log_trace:
+            combat.scheduler.tick()
+
+        log_trace.assert_called_once()
+        # the other fight still went on
+        self.assertEqual(attacker.location.messages, 1)
+
+    @patch("evennia.utils.logger.log_err")
+    @patch("twisted.internet.task.LoopingCall")
+    def test_scheduler_loop_error(self, mock_loop, mock_log_err):
+        scheduler = CombatScheduler()
+        scheduler.start()
+        errback = mock_loop.return_value.start.return_value.addErrback.call_args[0][0]
+
+        # the loop died while a fight still waits, a new one takes over
+        scheduler.pending[object()] = {}
+        errback(MagicMock())
+        mock_log_err.assert_called_once()
+        self.assertEqual(mock_loop.call_count, 2)
+        self.assertIsNotNone(scheduler._loop)
+
+        scheduler.pending.clear()
+        errback(MagicMock())
+        self.assertIsNone(scheduler._loop)
+
+    def test_ai_planning(self):
+        combat, (player, archer, brute, coward) = create_headless_combat(fighters=4)
+        player.is_pc = True
+        archer.weapon = HeadlessWeapon(attack_range=CombatRange.RANGED, attack_type=AttackType.RANGED)
+        coward.hp = 1
+        combat.positions[archer] = 4
+        combat.positions[brute] = 6
+        for fighter in (player, archer, brute, coward):
+            combat.invalidate_stats(fighter)
+
+        coward.ai_combat_policy = "cautious"
+        actions = {actor: (action, target) for actor, action, target in combat.plan_actions()}
+
+        self.assertNotIn(player, actions)
+        # the archer shoots the weakest one within range, the brute closes in
+        self.assertEqual(actions[archer], (AttackType.RANGED, coward))
+        self.assertEqual(actions[brute], (CombatMove.APPROACH, archer))
+        self.assertEqual(actions[coward][0], CombatMove.RETREAT)
+
+        combat.scheduler.tick()
+        self.assertEqual(combat.positions[brute], 5)
+        self.assertIn(combat, combat.scheduler.watched)
+
+    def test_ai_reach_weapon(self):
+        combat, (player, npc) = create_headless_combat(fighters=2)
+        player.is_pc = True
+        npc.weapon = HeadlessWeapon(attack_range=CombatRange.REACH, attack_type=AttackType.MELEE)
+        combat.positions[npc] = 2
+        combat.invalidate_stats(npc)
+
+        # a polearm is still swung in melee
+        self.assertEqual(combat.plan_actions(), [(npc, AttackType.MELEE, player)])
+
+    def test_npc_attacks_player(self):
+        class SafeLocation(NullLocation):
+            __slots__ = ()
+            allow_pvp = False
+
+        combat, (player, npc) = create_headless_combat(fighters=2, shields=False)
+        player.is_pc = True
+        location = SafeLocation()
+        for fighter in (player, npc):
+            fighter.location = location
+
+        self.assertTrue(combat.rules.validate_weapon_attack(npc, player, npc.weapon))
+
+        other_player = HeadlessFighter("other", is_pc=True, location=location)
+        combat.add(other_player)
+        self.assertFalse(combat.rules.validate_weapon_attack(player, other_player, player.weapon))
+
+        # nobody gets hit from another room
+        player.location = SafeLocation()
+        self.assertFalse(combat.rules.validate_weapon_attack(npc, player, npc.weapon))
+        self.assertEqual(combat.enemies_in_range(npc, CombatRange.RANGED), [other_player])
+
+    def test_ai_attack_cooldown(self):
+        combat, (player, npc) = create_headless_combat(fighters=2)
+        player.is_pc = True
+        self.assertEqual(combat.plan_actions(), [(npc, AttackType.MELEE, player)])
+
+        npc.cooldowns.add("attack", 10)
+        self.assertEqual(combat.plan_actions(), [])
+
+    def test_benchmark_planning(self):
+        result = benchmark_planning(npcs=5, plans=10, seed=1)
+        self.assertGreater(result["plans_per_second"], 0)
+
+    def test_event_log(self):
+        seed_streams(5)
+        combat, (first, second, third) = create_headless_combat(fighters=3, shields=False, hp=20)
+        seed_streams()
+        combat.retreat(third, first)
+        while second.combat:
+            combat.at_melee_attack(first, second)
+
+        events = list(combat.log)
+        self.assertEqual(events[0][1:], (CombatEvent.JOIN, first.id, None, 20))
+        self.assertEqual(events[3][1:], (CombatEvent.MOVE, third.id, None, 2))
+        self.assertEqual(events[-1][1:], (CombatEvent.LEAVE, second.id, None, 0))
+        self.assertEqual(combat.log.names[second.id], "fighter1")
+        damage = sum(value for _, kind, _, target, value in events if kind == CombatEvent.HIT)
+        self.assertEqual(damage, 20 - second.hp)
+
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "fight.clog")
+            combat.log.export(path)
+            log = CombatEventLog.load(path)
+        self.assertEqual(list(log), events)
+        self.assertEqual(log.names, combat.log.names)
+
+        replayed, fighters = replay(log)
+        self.assertEqual(fighters[second.id].hp, second.hp)
+        self.assertNotIn(fighters[second.id], replayed.positions)
+        self.assertEqual(replayed.positions[fighters[third.id]], combat.positions[third])
+
+    def test_event_log_same_names(self):
+        hero = HeadlessFighter("hero", hp=10)
+        goblins = [HeadlessFighter("goblin", hp=10) for _ in range(2)]
+        combat = HeadlessCombatHandler(hero, goblins[0])
+        combat.add(goblins[1])
+        goblins[0].at_damage(10)
+
+        replayed, fighters = replay(combat.log)
+        self.assertEqual(len(fighters), 3)
+        self.assertEqual(len(replayed.positions), 2)
+        self.assertIn(fighters[goblins[1].id], replayed.positions)
+
+    def test_event_log_overflow(self):
+        fighter = HeadlessFighter()
+        log = CombatEventLog(size=4)
+        for position in range(10):
+            log.record(CombatEvent.MOVE, fighter, value=position)
+
+        self.assertEqual(len(log), 4)
+        self.assertEqual(log.dropped, 6)
+        self.assertEqual([event[4] for event in log], [6, 7, 8, 9])
+
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "fight.clog")
+            log.export(path)
+            self.assertEqual(list(CombatEventLog.load(path)), list(log))
+
+    def test_benchmark(self):
+        result = benchmark_attacks(attacks=100, seed=1)
+        self.assertGreater(result["attacks_per_second"], 0)
+        self.assertEqual(result["messages"], 100)
+
+    def test_seeded(self):
+        damage = []
+        for _ in range(2):
+            seed_streams(7)
+            combat, (attacker, target) = create_headless_combat(shields=False)
+            for _ in range(50):
+                combat.at_melee_attack(attacker, target)
+            damage.append(target.hp_max - target.hp)
+        seed_streams()
+
+        # seeded fights play out the same
+        self.assertEqual(damage[0], damage[1])
+        self.assertGreater(damage[0], 0)
+
+    def test_dice_stream(self):
+        first, again = DiceRollEngine(RandomStream(3)), DiceRollEngine(RandomStream(3))
+        self.assertEqual([first.roll("2d6") for _ in range(20)], [again.roll("2d6") for _ in range(20)])
+
+        blocks = DiceRollEngine(RandomStream(3, block_size=16))
+        self.assertTrue(all(2 <= blocks.roll("2d6") <= 12 for _ in range(100)))
+
+
+class TestCombatBalance(BaseEvenniaTestCase):
+    def test_from_prototypes(self):
+        from world.combat_balance import Combatant
+        warrior = Combatant.from_prototypes(
+            "warrior", "dwarf", weapon="weapon_sword_common", armor=("armor_iron_common", "shield_round_common")
+        )
+        self.assertEqual(warrior.strength, 4)
+        self.assertEqual(warrior.armor, 3)
+        self.assertTrue(warrior.shield)
+        self.assertEqual((warrior.min_damage, warrior.max_damage), (1, 4))
+
+    def test_simulate_duel(self):
+        from world.combat_balance import Combatant, simulate_duel
+        weak = Combatant(hp=1)
+        strong = Combatant(strength=5, armor=10)
+        result = simulate_duel(weak, strong, fights=200, seed=1)
+        # fists can't pierce that armor
+        self.assertFalse(result.damage[0].any())
+        self.assertTrue((result.winner == 1).all())
+        self.assertEqual(result.summary()[1]["win_rate"], 1.0)
+        self.assertTrue((result.duration == simulate_duel(weak, strong, fights=200, seed=1).duration).all())
+
+    def test_simulate_parry(self):
+        from world.combat_balance import Combatant, simulate_duel
+        attacker = Combatant(hp=1000)
+        fencer = Combatant(hp=1000, stamina=1000, can_parry=True)
+        result = simulate_duel(attacker, fencer, fights=50, max_time=20, seed=1)
+        # plenty of stamina to parry everything
+        self.assertFalse(result.hits[0].any())
+        self.assertEqual(result.blocks[1].sum(), result.attacks[0].sum())
+
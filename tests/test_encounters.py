@@ -0,0 +1,53 @@
+"""
+Test the encounters.
+
+"""
+
+from evennia.utils.test_resources import BaseEvenniaTestCase
+
+from typeclasses.mobs.mob import BaseMob, VirtualMob
+from world.characters.classes import CharacterClasses
+from world.encounters.script import get_grid_cells
+
+
+class TestEncounterGrid(BaseEvenniaTestCase):
+    def test_get_grid_cells(self):
+        cell_xs, cell_ys = get_grid_cells(80, 67, 7)
+        self.assertEqual(len(cell_xs), 80)
+        self.assertEqual(len(cell_ys), 67)
+        self.assertEqual((cell_xs[0], cell_ys[0]), (0, 0))
+        self.assertEqual((cell_xs[-1], cell_ys[-1]), (6, 6))
+        # every cell of the grid covers part of the map
+        self.assertEqual(set(cell_xs), set(range(7)))
+        self.assertEqual(set(cell_ys), set(range(7)))
+
+
+class TestMobScaling(BaseEvenniaTestCase):
+    def test_get_scaled_stats(self):
+        stats = {"hp_max": 10, "mana_max": 2, "strength": 1, "cunning": 1, "will": 1}
+        scaling = {"strength": 1, "cunning": 1, "will": 1, "hp": 0.1, "mana": 0.5}
+
+        self.assertEqual(BaseMob.get_scaled_stats(stats, 1, scaling), stats)
+
+        scaled = BaseMob.get_scaled_stats(stats, 10, scaling, CharacterClasses.Rogue)
+        self.assertEqual(
+            scaled, {"hp_max": 20, "mana_max": 12, "strength": 3, "cunning": 3, "will": 2}
+        )
+        # the given stats are left untouched
+        self.assertEqual(stats["hp_max"], 10)
+
+
+class TestVirtualMob(BaseEvenniaTestCase):
+    def test_matches(self):
+        goblin = VirtualMob("goblin", "goblin", 1, {}, aliases=("gob",))
+        leader = VirtualMob("wolf_leader", "Wolf Pack Leader", 1, {})
+
+        for searchdata in ("goblin", "GOB", "go"):
+            self.assertTrue(goblin.matches(searchdata))
+        for searchdata in ("wolf", "pack lead", "leader wolf"):
+            self.assertTrue(leader.matches(searchdata))
+
+        # a bit of a word isn't enough
+        for searchdata in ("in", "o", "lin", ""):
+            self.assertFalse(goblin.matches(searchdata))
+        self.assertFalse(leader.matches("wolf rat"))
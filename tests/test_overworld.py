@@ -0,0 +1,67 @@
+"""
+Test the Overworld map.
+
+"""
+
+from evennia.prototypes.prototypes import save_prototype
+from evennia.utils.test_resources import BaseEvenniaTestCase, EvenniaTest
+
+from world.overworld.map import OverworldMap
+from world.overworld.provider import OverworldMapProvider, connect_cache_signals
+from world.overworld.landmarks import OverworldLandmarks
+from world.overworld.tiles import OverworldTiles
+
+
+class TestOverworldMap(BaseEvenniaTestCase):
+    def test_get_tile(self):
+        self.assertEqual(OverworldMap.get_tile((0, 0)), OverworldTiles.Water)
+        # every cell of a multi-character symbol resolves to the same tile
+        for x in range(31, 34):
+            self.assertEqual(OverworldMap.get_tile((x, 62)), OverworldTiles.City)
+
+    def test_get_tile_out_of_bounds(self):
+        self.assertIsNone(OverworldMap.get_tile((-1, 0)))
+        self.assertIsNone(OverworldMap.get_tile((OverworldMap.WIDTH, 0)))
+        self.assertIsNone(OverworldMap.get_tile((0, OverworldMap.HEIGHT)))
+
+    def test_get_landmark_over_tile(self):
+        landmark = OverworldLandmarks.Whiterock_Kingdom
+        x, y = landmark.coordinates
+        coordinates = (x, OverworldMap.HEIGHT - 1 - y)
+        self.assertEqual(OverworldMap.get(coordinates), landmark)
+        self.assertNotEqual(OverworldMap.get_tile(coordinates), landmark)
+
+    def test_get_rect_display(self):
+        symbols = OverworldMap.get_rect_symbols(30, 20, 13, 9)
+        expected = "\n".join("".join(row) for row in symbols)
+        self.assertEqual(OverworldMap.get_rect_display(30, 20, 13, 9), expected)
+        # rendering the same viewport again is served from the cache
+        hits = OverworldMap.get_rect_display.cache_info().hits
+        OverworldMap.get_rect_display(30, 20, 13, 9)
+        self.assertEqual(OverworldMap.get_rect_display.cache_info().hits, hits + 1)
+
+
+class TestOverworldProvider(EvenniaTest):
+    def setUp(self):
+        super().setUp()
+        connect_cache_signals()
+        OverworldMapProvider._room_desc_cache["room"] = "A room."
+
+    def tearDown(self):
+        OverworldMapProvider.clear_cache()
+        super().tearDown()
+
+    def test_area_tags_clear_cache(self):
+        self.room1.tags.add("dungeon", category="other")
+        self.assertTrue(OverworldMapProvider._room_desc_cache)
+
+        self.room1.tags.add("area_exit", category="area_def")
+        self.assertFalse(OverworldMapProvider._room_desc_cache)
+
+        OverworldMapProvider._room_desc_cache["room"] = "A room."
+        self.room1.tags.remove("area_exit", category="area_def")
+        self.assertFalse(OverworldMapProvider._room_desc_cache)
+
+    def test_prototype_save_clears_cache(self):
+        save_prototype({"prototype_key": "test_overworld_room", "desc": "A new room."})
+        self.assertFalse(OverworldMapProvider._room_desc_cache)
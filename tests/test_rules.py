@@ -0,0 +1,178 @@
+"""
+Test the dice roll engine.
+
+"""
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from evennia.utils.test_resources import BaseEvenniaTestCase
+
+from world.dice import AliasSampler, compile_table, parse_dice
+from world.enums import Ability
+from world.odds import (
+    combat_hit_chance,
+    damage_distribution,
+    dice_distribution,
+    opposed_saving_throw_chance,
+    saving_throw_chance,
+)
+from world.random_tables import chargen_tables, death_and_dismemberment
+from world.rng import RandomStream
+from world.rules import DiceRollEngine
+
+
+class _Mob:
+    def __init__(self, morale):
+        self.morale = morale
+
+
+class TestDiceRollEngine(BaseEvenniaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dice = DiceRollEngine(RandomStream(1))
+
+    def test_parse(self):
+        expression = parse_dice("4d6kh3+2")
+        self.assertEqual((expression.number, expression.size, expression.keep, expression.modifier), (4, 6, 3, 2))
+        self.assertEqual(parse_dice("2D20kl1").keep, -1)
+        self.assertEqual(parse_dice("1d8 - 1").modifier, -1)
+        # parsed once
+        self.assertIs(parse_dice("2d6+3"), parse_dice("2d6+3"))
+
+        for roll_string in ("d6", "abc", "2d", "0d6", "1d1001", "2d6kh3", "2d6+"):
+            with self.assertRaises(TypeError):
+                parse_dice(roll_string)
+
+    def test_roll(self):
+        for roll_string in ("2d6+3", "1d282", "4d6kh3", "2d20kl1", "3d4-3"):
+            expression = parse_dice(roll_string)
+            for _ in range(50):
+                self.assertTrue(expression.minimum <= self.dice.roll(roll_string) <= expression.maximum)
+
+        with self.assertRaises(TypeError):
+            self.dice.roll("11d6")
+        self.assertLessEqual(self.dice.roll("11d6", max_number=11), 66)
+
+    @patch("world.rules.randint")
+    def test_roll_keep(self, mock_randint):
+        dice = DiceRollEngine()
+        mock_randint.side_effect = [2, 6, 1, 5]
+        self.assertEqual(dice.roll("4d6kh3"), 6 + 5 + 2)
+        mock_randint.side_effect = [2, 6, 1, 5]
+        self.assertEqual(dice.roll("4d6kl1+1"), 2)
+
+    def test_roll_many(self):
+        rolls = self.dice.roll_many("4d6kh3", 1000)
+        self.assertEqual(rolls.shape, (1000,))
+        self.assertTrue(((rolls >= 3) & (rolls <= 18)).all())
+        self.assertAlmostEqual(rolls.mean(), 12.24, delta=0.5)
+
+        # a seeded engine rolls the same batches
+        first, again = DiceRollEngine(RandomStream(3)), DiceRollEngine(RandomStream(3))
+        self.assertEqual(list(first.roll_many("2d6", 50)), list(again.roll_many("2d6", 50)))
+
+    def test_compile_table(self):
+        table = compile_table(chargen_tables["armor"])
+        self.assertIs(compile_table(chargen_tables["armor"]), table)
+        self.assertEqual(len(table), 20)
+        self.assertEqual([table[roll] for roll in (0, 1, 4, 14, 15, 20, 21)], [
+            "no armor", "no armor", "gambeson", "gambeson", "brigandine", "chain", "chain"
+        ])
+
+        # gaps give the first result, overlaps the first matching range
+        table = compile_table([("1-2", "low"), ("5-6", "high"), ("2-3", "middle")])
+        self.assertEqual([table[roll] for roll in range(1, 7)], ["low", "low", "middle", "low", "high", "high"])
+
+        deaths = compile_table(death_and_dismemberment)
+        self.assertEqual((deaths[1], deaths[8], deaths[9]), ("dead", "disfigured", "disfigured"))
+
+    @patch("world.rules.randint")
+    def test_roll_random_table(self, mock_randint):
+        mock_randint.return_value = 282
+        self.assertEqual(DiceRollEngine().roll_random_table("1d282", chargen_tables["name"]), chargen_tables["name"][-1])
+        mock_randint.return_value = 16
+        self.assertEqual(DiceRollEngine().roll_random_table("1d20", chargen_tables["alignment"]), "chaos")
+
+    def test_alias_sampler(self):
+        sampler = AliasSampler(["rare", "common"], [1, 9])
+        picks = [self.dice.sample(sampler) for _ in range(2000)]
+        self.assertAlmostEqual(picks.count("rare") / 2000, 0.1, delta=0.03)
+        picks = sampler.sample_many(np.random.default_rng(1), 2000)
+        self.assertAlmostEqual(picks.count("rare") / 2000, 0.1, delta=0.03)
+
+        with self.assertRaises(ValueError):
+            AliasSampler(["nothing"], [0])
+
+    @patch("world.rules.randint")
+    def test_saving_throw_result(self, mock_randint):
+        mock_randint.return_value = 14
+        character = MagicMock(strength=2, armor=1)
+
+        result = DiceRollEngine().saving_throw(character, bonus_type=Ability.STR)
+        self.assertTrue(result.passed)
+        self.assertIsNone(result[1])
+        # nobody read the text yet
+        self.assertIsNone(result._txt)
+
+        passed, quality, txt = result
+        self.assertEqual(txt, "rolled 14 on d20  + strength(+2) vs 15 -> |wTrue|n")
+        self.assertEqual(result, (True, None, txt))
+
+        result = DiceRollEngine().opposed_saving_throw(character, character, modifier=-6)
+        self.assertEqual(result[0], False)
+        self.assertTrue(result.txt.startswith("Roll vs armor(11):\n"))
+
+    @patch("world.rules.randint")
+    def test_roll_death_invalidates_stats(self, mock_randint):
+        # "weakened" on the death table, then 1 strength lost and 1 health healed
+        mock_randint.side_effect = [3, 1, 1]
+        character = MagicMock(strength=3)
+
+        DiceRollEngine().roll_death(character)
+        self.assertEqual(character.strength, 2)
+        character.combat.invalidate_stats.assert_called_once_with(character)
+
+    def test_group_morale_check(self):
+        brave = [_Mob(morale=12) for _ in range(20)]
+        cowards = [_Mob(morale=1) for _ in range(20)]
+        self.assertEqual(self.dice.group_morale_check(brave + cowards), set(cowards))
+        self.assertEqual(self.dice.group_morale_check([]), set())
+
+        # 2d6 above 7 in 15 rolls out of 36
+        pack = [_Mob(morale=7) for _ in range(3600)]
+        self.assertAlmostEqual(len(self.dice.group_morale_check(pack)) / 3600, 15 / 36, delta=0.03)
+
+
+class TestOdds(BaseEvenniaTestCase):
+    def test_dice_distribution(self):
+        distribution = dice_distribution("2d6+3")
+        self.assertEqual((distribution.minimum, distribution.maximum), (5, 15))
+        self.assertAlmostEqual(distribution.pmf[7 - 5 + 3], 6 / 36)
+        self.assertAlmostEqual(distribution.mean, 10)
+        self.assertAlmostEqual(dice_distribution("4d6kh3").mean, 15869 / 1296)
+        # the highest of 2d20 is 20 in 39 rolls out of 400
+        self.assertAlmostEqual(dice_distribution("2d20kh1").pmf[-1], 39 / 400)
+        self.assertAlmostEqual(dice_distribution("2d20kl1").pmf[-1], 1 / 400)
+        self.assertIs(dice_distribution("1d20"), dice_distribution("1d20"))
+
+    def test_saving_throw_chance(self):
+        # d20 + 2 > 15 on 14 to 20
+        self.assertAlmostEqual(saving_throw_chance(2), 7 / 20)
+        self.assertAlmostEqual(saving_throw_chance(2, advantage=True), 1 - (13 / 20) ** 2)
+        self.assertAlmostEqual(saving_throw_chance(2, disadvantage=True), (7 / 20) ** 2)
+        self.assertAlmostEqual(saving_throw_chance(2, advantage=True, disadvantage=True), 7 / 20)
+        self.assertAlmostEqual(saving_throw_chance(0, modifier=-20), 0)
+        self.assertAlmostEqual(opposed_saving_throw_chance(1, 2), 9 / 20)
+
+    def test_combat_odds(self):
+        # randrange(1, 6) twice on each side, attack >= dodge
+        rolls = [first + second for first in range(1, 6) for second in range(1, 6)]
+        hits = sum(attack + 2 >= dodge + 1 for attack in rolls for dodge in rolls)
+        self.assertAlmostEqual(combat_hit_chance(2, 1), hits / len(rolls) ** 2)
+        self.assertLess(combat_hit_chance(2, 1, defender_aggro="defensive"), combat_hit_chance(2, 1))
+
+        # randrange(1, 4) + 1, times 1.5 rounded down, minus 1 armor
+        distribution = damage_distribution(1, 4, bonus=1, aggro="aggressive", armor=1)
+        self.assertEqual(list(distribution.values), [2, 3, 4, 5])
+        self.assertAlmostEqual(distribution.mean, (2 + 3 + 5) / 3)
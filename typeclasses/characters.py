@@ -66,7 +66,12 @@ class BaseCharacter(ObjectParent, DefaultCharacter):
 
     @property
     def combat(self) -> 'CombatHandler | None':
-        return self.ndb.combat
+        combat = self.ndb.combat
+        if combat is not None and combat.parent is not None:
+            # the fight was merged into another one
+            combat = self.ndb.combat = combat.find()
+
+        return combat
 
     @combat.setter
     def combat(self, value) -> None:
@@ -86,6 +91,16 @@ class BaseCharacter(ObjectParent, DefaultCharacter):
     def cooldowns(self):
         return CooldownHandler(self)
 
+    def search(self, searchdata, *args, **kwargs):
+        """
+        Creates the virtual mobs of the location before searching if they are being looked for.
+        """
+        if isinstance(searchdata, str) and self.location:
+            if promote := getattr(self.location, 'promote_virtual_mobs', None):
+                promote(searchdata)
+
+        return super().search(searchdata, *args, **kwargs)
+
     @property
     def hurt_level(self):
         """
@@ -204,6 +219,12 @@ class BaseCharacter(ObjectParent, DefaultCharacter):
 
         self.location.msg_contents(f"$You() $conj(die).", from_obj=self)
 
+    def at_post_move(self, source_location, **kwargs):
+        super().at_post_move(source_location, **kwargs)
+        # walking out of the room leaves the fight
+        if (combat := self.combat) and self.location != source_location:
+            combat.remove(self)
+
     def at_pay(self, amount):
         """
         Get coins, but no more than we actually have.
@@ -390,6 +411,9 @@ class Character(BaseCharacter):
 
     def at_post_puppet(self, **kwargs):
         super().at_post_puppet(**kwargs)
+        # A new session has no map yet, and hasn't said it understands map deltas
+        self.ndb.map_origin = None
+        self.ndb.map_deltas = False
         # Here we add Keybinds for Evelite Webclient so we can walk around with the numpad
         self.msg(
             key_cmds=(
@@ -409,8 +433,37 @@ class Character(BaseCharacter):
 
     def at_post_move(self, source_location, **kwargs):
         super().at_post_move(source_location, **kwargs)
-        if map_getter := getattr(self.location, 'get_map_display', None):
-            # Send the map to the WebClient
+        self.send_map()
+
+    def send_map(self, full=False):
+        """
+        Send the map of the current location to the WebClient.
+
+        When the client asked for map deltas and already displays a map one step
+        away, only the rows and columns that scrolled into view are sent through the
+        `map_delta` command. Other clients always get the complete map.
+
+        Args:
+            full (bool, optional): Always send the complete map, used to resync the client.
+
+        """
+        location = self.location
+        map_getter = getattr(location, 'get_map_display', None)
+        if not map_getter:
+            # The client's map no longer matches anything we could send a delta for
+            self.ndb.map_origin = None
+            return
+
+        delta = None
+        if not self.ndb.map_deltas:
+            self.ndb.map_origin = None
+        elif delta_getter := getattr(location, 'get_map_delta', None):
+            previous_origin = None if full else self.ndb.map_origin
+            self.ndb.map_origin, delta = delta_getter(self, previous_origin)
+
+        if delta:
+            self.msg(map_delta=((), delta))
+        else:
             self.msg(map=map_getter(looker=self))
 
 
@@ -53,7 +53,8 @@ class OverworldExit(wilderness.WildernessExit):
 
         overworld = Overworld.get_instance()
         x, y = overworld.get_obj_coordinates(traversing_object)
-        EncounterScript.get().get_encounter_at(target_location, x, y)
+        # The encounter is only queued here, mobs show up on the next tick
+        EncounterScript.get().get_encounter_at(traversing_object.location, x, y)
 
     def at_traverse_coordinates(self, traversing_object, current_coordinates, new_coordinates):
         """
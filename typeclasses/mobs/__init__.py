@@ -1,2 +1,2 @@
-from typeclasses.mobs.mob import BaseMob
+from typeclasses.mobs.mob import BaseMob, VirtualMob
 from typeclasses.mobs.goblins import Goblin
\ No newline at end of file
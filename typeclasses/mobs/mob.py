@@ -1,11 +1,57 @@
-from evennia.prototypes.spawner import spawn
+from django.db import transaction
+
+from evennia.prototypes.prototypes import search_prototype
+from evennia.prototypes.spawner import flatten_prototype, spawn
 from evennia.typeclasses.attributes import AttributeProperty
 from typeclasses.characters import BaseCharacter
+from world.characters.classes import CharacterClasses
+
+_SCALED_STATS = ("hp_max", "mana_max", "strength", "cunning", "will")
+
+
+class VirtualMob:
+    """
+    A mob that was rolled but not created yet, see `BaseMob.roll_group`.
+    Rooms can hold these until someone engages them, see `Room.promote_virtual_mobs`.
+    """
+    __slots__ = ("prototype_key", "key", "level", "stats", "tags", "aliases")
+
+    def __init__(self, prototype_key: str, key: str, level: int, stats: dict, tags: tuple = (), aliases: tuple = ()):
+        self.prototype_key = prototype_key
+        self.key = key
+        self.level = level
+        self.stats = stats
+        self.tags = tags
+        self.aliases = aliases
+
+    def __str__(self):
+        return self.key
+
+    def matches(self, searchdata: str) -> bool:
+        """
+        Whether searching for `searchdata` would find this mob once created: it is its key
+        or one of its aliases, or each of its words starts a word of one of them.
+        """
+        searchdata = searchdata.lower()
+        search_words = searchdata.split()
+        for name in (self.key, *self.aliases):
+            name = name.lower()
+            if name == searchdata:
+                return True
+            name_words = name.split()
+            if search_words and all(
+                any(name_word.startswith(word) for name_word in name_words) for word in search_words
+            ):
+                return True
+
+        return False
 
 
 class BaseMob(BaseCharacter):
     starting_equipment_prototypes = AttributeProperty()
     mob_scaling = AttributeProperty()
+    ai_combat_policy = AttributeProperty(default="aggressive", autocreate=False)  # see world.combat_ai
+    morale = AttributeProperty(default=9, autocreate=False)
 
     def at_object_creation(self):
         super().at_object_creation()
@@ -19,28 +65,203 @@ class BaseMob(BaseCharacter):
         for eq in equipment:
             self.equipment.move(eq)
 
-    def scale_to_level(self, level: int):
+    @classmethod
+    def spawn_group(cls, prototype_amounts, level=1, location=None, tags=()):
+        """
+        Spawn many mobs at once, for example a whole encounter.
+
+        Args:
+            prototype_amounts (iterable): Tuples of `(prototype_key, amount)`.
+            level (int, optional): The level to scale the mobs to.
+            location (Object, optional): Where to create the mobs.
+            tags (tuple, optional): Extra `(key, category)` tags to give to the mobs.
+
+        Returns:
+            list: The spawned mobs.
+
+        """
+        return cls.spawn_virtual(cls.roll_group(prototype_amounts, level, tags=tags), location=location)
+
+    @classmethod
+    def roll_group(cls, prototype_amounts, level=1, tags=()):
+        """
+        Roll the stats of many mobs without creating them.
+
+        Args:
+            prototype_amounts (iterable): Tuples of `(prototype_key, amount)`.
+            level (int, optional): The level to scale the mobs to.
+            tags (tuple, optional): Extra `(key, category)` tags the mobs will be created with.
+
+        Returns:
+            list: A VirtualMob for each mob, see `spawn_virtual` to create them.
+
+        """
+        flattened = {}
+        virtual_mobs = []
+        for prototype_key, amount in prototype_amounts:
+            if amount <= 0:
+                continue
+
+            prototype = cls._get_flattened_prototype(prototype_key, flattened)
+            attrs = cls._get_prototype_attrs(prototype)
+            cclass = CharacterClasses.get(attrs.get("cclass_key"))
+            for _ in range(amount):
+                stats = {}
+                for stat in _SCALED_STATS:
+                    value = attrs.get(stat, 1)
+                    stats[stat] = value() if callable(value) else value
+
+                stats = cls.get_scaled_stats(stats, level, attrs.get("mob_scaling"), cclass)
+                virtual_mobs.append(
+                    VirtualMob(
+                        prototype_key,
+                        prototype.get("key", prototype_key),
+                        level,
+                        stats,
+                        tuple(tags),
+                        aliases=tuple(prototype.get("aliases") or ()),
+                    )
+                )
+
+        return virtual_mobs
+
+    @classmethod
+    def spawn_virtual(cls, virtual_mobs, location=None):
+        """
+        Create the mobs described by VirtualMobs.
+
+        Each prototype is only searched and flattened once, the mobs are created with their
+        scaled stats and all their starting equipment is spawned in a single batch,
+        everything inside one database transaction.
+
+        Args:
+            virtual_mobs (iterable): The VirtualMobs to create.
+            location (Object, optional): Where to create the mobs.
+
+        Returns:
+            list: The spawned mobs.
+
+        """
+        flattened = {}
+        mob_prototypes = []
+        mob_equipment = []
+        for virtual_mob in virtual_mobs:
+            prototype = cls._get_flattened_prototype(virtual_mob.prototype_key, flattened)
+            mob_prototype, equipment_prototypes = cls._get_scaled_prototype(
+                prototype, virtual_mob.level, virtual_mob.stats, location
+            )
+            if virtual_mob.tags:
+                mob_prototype["tags"] = list(mob_prototype.get("tags", ())) + list(virtual_mob.tags)
+            mob_prototypes.append(mob_prototype)
+            mob_equipment.append(equipment_prototypes)
+
+        if not mob_prototypes:
+            return []
+
+        with transaction.atomic():
+            mobs = spawn(*mob_prototypes)
+            owners = []
+            equipment_prototypes = []
+            for mob, mob_equipment_prototypes in zip(mobs, mob_equipment):
+                for equipment_prototype in mob_equipment_prototypes:
+                    owners.append(mob)
+                    equipment_prototypes.append(equipment_prototype)
+
+            if equipment_prototypes:
+                for owner, eq in zip(owners, spawn(*equipment_prototypes)):
+                    owner.equipment.move(eq)
+
+        return mobs
+
+    @staticmethod
+    def _get_flattened_prototype(prototype_key, flattened):
+        prototype = flattened.get(prototype_key)
+        if prototype is None:
+            prototype = flatten_prototype(search_prototype(prototype_key, require_single=True)[0])
+            flattened[prototype_key] = prototype
+
+        return prototype
+
+    @staticmethod
+    def _get_prototype_attrs(prototype):
+        # Flattened prototypes keep their attributes in `attrs`, without category
+        return {attr[0]: attr[1] for attr in prototype.get("attrs", ()) if len(attr) < 3 or not attr[2]}
+
+    @classmethod
+    def _get_scaled_prototype(cls, prototype, level, stats, location):
+        """
+        Returns a copy of a flattened prototype with the already scaled stats,
+        so the mob never gets saved with its unscaled stats, along with its starting
+        equipment prototypes which are left out to be spawned with the rest of the group.
+        """
+        stats = dict(stats, hp=stats["hp_max"], mana=stats["mana_max"])
+        overridden = set(stats) | {"starting_equipment_prototypes"}
+        mob_attrs = [
+            attr for attr in prototype.get("attrs", ())
+            if attr[0] not in overridden or (len(attr) > 2 and attr[2])
+        ]
+        mob_attrs.extend((stat, value, None, "") for stat, value in stats.items())
+        if level > 1:
+            mob_attrs.append(("level", level, "levels", ""))
+
+        mob_prototype = dict(prototype, attrs=mob_attrs)
+        if location:
+            mob_prototype["location"] = location
+
+        equipment_prototypes = cls._get_prototype_attrs(prototype).get("starting_equipment_prototypes")
+
+        return mob_prototype, equipment_prototypes or ()
+
+    @staticmethod
+    def get_scaled_stats(stats, level, mob_scaling, cclass=None):
+        """
+        Scale a mob's stats to a level.
+
+        Args:
+            stats (dict): The current `hp_max`, `mana_max`, `strength`, `cunning` and `will`.
+            level (int): The level to scale to.
+            mob_scaling (dict): How much each stat grows with levels.
+            cclass (CharacterClass, optional): The mob's class, its primary and secondary
+                stats grow faster.
+
+        Returns:
+            dict: The scaled stats.
+
+        """
+        stats = dict(stats)
         if level <= 1:
-            return
+            return stats
 
-        self.hp_max += int(self.hp_max * level * self.mob_scaling.get("hp", 0.1))
-        self.mana_max += int(self.mana_max * level * self.mob_scaling.get("mana", 0.1))
+        mob_scaling = mob_scaling or {}
+        stats["hp_max"] += int(stats["hp_max"] * level * mob_scaling.get("hp", 0.1))
+        stats["mana_max"] += int(stats["mana_max"] * level * mob_scaling.get("mana", 0.1))
 
         stat_levels = {
             "strength": 6,
             "cunning": 6,
             "will": 6,
         }
-        if self.cclass:
-            stat_levels[self.cclass.primary_stat] = 4
-            stat_levels[self.cclass.secondary_stat] = 5
+        if cclass:
+            stat_levels[cclass.primary_stat] = 4
+            stat_levels[cclass.secondary_stat] = 5
 
         for stat, value in stat_levels.items():
             stat_levels[stat] = int(level / value)
 
-        self.strength += int(stat_levels["strength"] * self.mob_scaling.get("strength", 0.1))
-        self.cunning += int(stat_levels["cunning"] * self.mob_scaling.get("cunning", 0.1))
-        self.will += int(stat_levels["will"] * self.mob_scaling.get("will", 0.1))
+        stats["strength"] += int(stat_levels["strength"] * mob_scaling.get("strength", 0.1))
+        stats["cunning"] += int(stat_levels["cunning"] * mob_scaling.get("cunning", 0.1))
+        stats["will"] += int(stat_levels["will"] * mob_scaling.get("will", 0.1))
+
+        return stats
+
+    def scale_to_level(self, level: int):
+        if level <= 1:
+            return
+
+        stats = {stat: getattr(self, stat) for stat in _SCALED_STATS}
+        stats = self.get_scaled_stats(stats, level, self.mob_scaling, self.cclass)
+        for stat, value in stats.items():
+            setattr(self, stat, value)
 
         self.levels.level = level
 
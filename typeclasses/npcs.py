@@ -11,16 +11,30 @@ from world.enums import Ability
 from .characters import BaseCharacter
 
 
+class CombatStatProperty(AttributeProperty):
+    """
+    AttributeProperty of a value combat keeps in its stats snapshot, changing it during a
+    fight drops the snapshot, see `CombatHandler.invalidate_stats`.
+    """
+
+    def at_set(self, value, obj):
+        if combat := getattr(obj, "combat", None):
+            combat.invalidate_stats(obj)
+
+        return value
+
+
 class NPC(BaseCharacter):
     is_pc = False
 
-    armor = AttributeProperty(default=1, autocreate=False)  # +10 to get armor defense
+    armor = CombatStatProperty(default=1, autocreate=False)  # +10 to get armor defense
     morale = AttributeProperty(default=9, autocreate=False)
     allegiance = AttributeProperty(default=Ability.ALLEGIANCE_HOSTILE, autocreate=False)
 
     is_idle = AttributeProperty(default=False, autocreate=False)
+    ai_combat_policy = AttributeProperty(default="aggressive", autocreate=False)  # see world.combat_ai
 
-    weapon = AttributeProperty(autocreate=False)  # instead of inventory
+    weapon = CombatStatProperty(autocreate=False)  # instead of inventory
     coins = AttributeProperty(default=1, autocreate=False)  # coin loot
 
     def at_object_creation(self):
@@ -34,11 +48,16 @@ class NPC(BaseCharacter):
 
     def ai_combat_next_action(self):
         """
-        The combat engine should ask this method in order to
-        get the next action the npc should perform in combat.
+        The next action this npc would perform in combat. The combat scheduler plans
+        the actions of all npcs of a fight at once instead, see `world.combat_ai`.
+
+        Returns:
+            tuple or None: `(action, target)`, None if it does nothing.
 
         """
-        pass
+        from world.combat_ai import combat_planner
+
+        return combat_planner.next_action(self)
 
 
 class TalkativeNPC(NPC):
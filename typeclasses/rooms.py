@@ -4,11 +4,16 @@ Room
 Rooms are simple containers that has no location of their own.
 
 """
+import re
 
 from evennia.contrib.grid import wilderness
 from evennia.contrib.grid.xyzgrid.xyzroom import XYZRoom
-from evennia.objects.objects import DefaultRoom
+from evennia.objects.objects import DefaultObject, DefaultRoom
+from evennia.utils.funcparser import ACTOR_STANCE_CALLABLES, FuncParser
+from evennia.utils.utils import iter_to_str, make_iter
+from world.combat import combat_scheduler
 from world.overworld import Overworld, OverworldMap
+from world.overworld.provider import OverworldMapProvider
 from .objects import ObjectParent
 
 CHAR_SYMBOL = "|w@|n"
@@ -16,6 +21,30 @@ CHAR_ALT_SYMBOL = "|w>|n"
 ROOM_SYMBOL = "|bo|n"
 LINK_COLOR = "|B"
 
+# Strips the multimatch index from searches like `goblin-2`
+_RE_MULTIMATCH_INDEX = re.compile(r"-[0-9]+$")
+
+# Same parser as the one of msg_contents
+_COMBAT_EVENTS_PARSER = FuncParser(ACTOR_STANCE_CALLABLES)
+
+# typeclass: whether it overrides the hooks receiving messages
+_MESSAGE_HOOKS = {}
+
+
+def _has_message_hooks(obj):
+    """
+    Whether an object does anything with the messages it receives besides sending them to
+    its sessions, that is if its typeclass overrides `msg` or `at_msg_receive`.
+    """
+    cls = type(obj)
+    hooks = _MESSAGE_HOOKS.get(cls)
+    if hooks is None:
+        hooks = _MESSAGE_HOOKS[cls] = (
+            cls.msg is not DefaultObject.msg or cls.at_msg_receive is not DefaultObject.at_msg_receive
+        )
+
+    return hooks
+
 _MAP_GRID = [
     [" ", " ", " ", " ", " "],
     [" ", " ", " ", " ", " "],
@@ -45,6 +74,154 @@ class Room(ObjectParent, DefaultRoom):
     allow_pvp = False
     allow_death = False
 
+    def at_object_delete(self):
+        if self.tags.has("area_exit", category="area_def"):
+            OverworldMapProvider.clear_cache()
+
+        return super().at_object_delete()
+
+    @property
+    def virtual_mobs(self):
+        """
+        Mobs waiting in this room that were not created yet, see `BaseMob.roll_group`.
+        """
+        virtual_mobs = self.ndb.virtual_mobs
+        if virtual_mobs and self.ndb.virtual_mobs_coordinates != getattr(self, "coordinates", None):
+            # The wilderness moved this room elsewhere, the mobs stay behind
+            virtual_mobs = self.ndb.virtual_mobs = None
+
+        return virtual_mobs or []
+
+    def add_virtual_mobs(self, virtual_mobs):
+        """
+        Place mobs in this room without creating them. They are created as soon
+        as someone searches for them, to attack or look at them for instance.
+
+        Args:
+            virtual_mobs (list): The VirtualMobs to add.
+
+        """
+        self.ndb.virtual_mobs = self.virtual_mobs + list(virtual_mobs)
+        self.ndb.virtual_mobs_coordinates = getattr(self, "coordinates", None)
+
+    def promote_virtual_mobs(self, searchdata=None):
+        """
+        Create the virtual mobs of this room, they are all created together
+        since engaging one member of a group engages all of them.
+
+        Args:
+            searchdata (str, optional): Only create them if searching for this would find
+                one of them, see `VirtualMob.matches`.
+
+        Returns:
+            list: The created mobs.
+
+        """
+        virtual_mobs = self.virtual_mobs
+        if not virtual_mobs:
+            return []
+
+        if searchdata is not None:
+            searchdata = _RE_MULTIMATCH_INDEX.sub("", searchdata).strip().lower()
+            if not searchdata or not any(mob.matches(searchdata) for mob in virtual_mobs):
+                return []
+
+        self.ndb.virtual_mobs = None
+        # This is to avoid Circular Imports between the Typeclasses
+        from typeclasses.mobs.mob import BaseMob
+
+        return BaseMob.spawn_virtual(virtual_mobs, location=self)
+
+    def msg_contents(self, text=None, exclude=None, from_obj=None, mapping=None, **kwargs):
+        """
+        Buffers plain messages to players while the combat scheduler resolves a tick, they
+        are sent by `msg_combat_events` once it is over. Objects without an account only
+        get them, right away, if they override `msg` or `at_msg_receive`. Messages with
+        options or extra kwargs can't be merged, what was buffered before them is sent first.
+        """
+        messages = combat_scheduler.messages
+        if messages.buffering:
+            if isinstance(text, str) and not kwargs:
+                messages.add(self, text, exclude=exclude, from_obj=from_obj, mapping=mapping)
+                exclude = make_iter(exclude) if exclude else ()
+                listeners = [
+                    obj
+                    for obj in self.contents
+                    if not obj.has_account and not obj.destination and obj not in exclude and _has_message_hooks(obj)
+                ]
+                if not listeners:
+                    return
+                exclude = [obj for obj in self.contents if obj not in listeners]
+            else:
+                messages.flush_location(self)
+
+        super().msg_contents(text, exclude=exclude, from_obj=from_obj, mapping=mapping, **kwargs)
+
+    def msg_combat_events(self, events):
+        """
+        Send the messages buffered during a combat tick as a single message per recipient.
+        Each template is parsed once per perspective instead of once per recipient, a
+        perspective being whether the recipient is the actor or one of the mapped objects,
+        and whether it sees builder names.
+
+        Args:
+            events (list): (text, exclude, from_obj, mapping) tuples, see `msg_contents`.
+        """
+        events = [
+            (text, make_iter(exclude) if exclude else (), from_obj or self, mapping)
+            for text, exclude, from_obj, mapping in events
+        ]
+        rendered = {}
+
+        for receiver in self.contents:
+            # got them from msg_contents already
+            if not receiver.has_account:
+                continue
+
+            builder = receiver.locks.check_lockstring(receiver, "perm(Builder)")
+            lines = []
+            for index, (text, exclude, caller, mapping) in enumerate(events):
+                if receiver in exclude:
+                    continue
+
+                perspective = (
+                    index,
+                    receiver is caller,
+                    builder,
+                    tuple(receiver is obj for obj in mapping.values()) if mapping else (),
+                )
+                line = rendered.get(perspective)
+                if line is None:
+                    line = _COMBAT_EVENTS_PARSER.parse(
+                        text, return_string=True, caller=caller, receiver=receiver, mapping=mapping
+                    )
+                    if mapping:
+                        line = line.format_map(
+                            {
+                                key: obj.get_display_name(looker=receiver)
+                                if hasattr(obj, "get_display_name")
+                                else str(obj)
+                                for key, obj in mapping.items()
+                            }
+                        )
+                    rendered[perspective] = line
+
+                lines.append(line)
+
+            if lines:
+                receiver.msg(text=("\n".join(lines), {"type": "combat"}))
+
+    def get_display_characters(self, looker, **kwargs):
+        characters = [
+            char.get_display_name(looker, **kwargs)
+            for char in self.contents_get(content_type="character")
+            if char != looker and char.access(looker, "view")
+        ]
+        characters.extend(mob.key for mob in self.virtual_mobs)
+        character_names = iter_to_str(characters)
+
+        return f"|wCharacters:|n {character_names}" if character_names else ""
+
 
 class OverworldRoom(wilderness.WildernessRoom, Room):
     """
@@ -67,24 +244,88 @@ class OverworldRoom(wilderness.WildernessRoom, Room):
 
         return result
 
-    def get_map_display(self, looker):
+    def get_map_origin(self, looker):
+        """
+        Returns the world coordinates of the top left corner of the looker's map view.
+        """
         overworld = Overworld.get_instance()
         x, y = overworld.get_obj_coordinates(looker)
+
+        return x - self.VIEW_HALF_WIDTH, y - self.VIEW_HALF_HEIGHT
+
+    def get_map_display(self, looker):
         width = self.VIEW_WIDTH
         height = self.VIEW_HEIGHT
         half_width = self.VIEW_HALF_WIDTH
         half_height = self.VIEW_HALF_HEIGHT
-        top_left_x = x - half_width
-        top_left_y = y - half_height
+        top_left_x, top_left_y = self.get_map_origin(looker)
 
-        symbols = OverworldMap.get_rect_symbols(top_left_x, top_left_y, width, height)
-        symbols[half_height][half_width] = "@"
-        rows = ["".join((symbol for symbol in row)) for row in symbols]
-
-        tile_str = "\n".join(rows)
+        tile_str = OverworldMap.get_rect_display(top_left_x, top_left_y, width, height)
+        # Every row is `width` symbols followed by a newline
+        center = half_height * (width + 1) + half_width
+        tile_str = f"{tile_str[:center]}@{tile_str[center + 1:]}"
 
         return tile_str
 
+    def get_map_delta(self, looker, previous_origin):
+        """
+        Returns the changes needed to turn the map view at `previous_origin`
+        into the looker's current map view.
+
+        Args:
+            looker (Object): The one looking at the map.
+            previous_origin (tuple or None): Top left world coordinates of the
+                view the looker's client currently displays.
+
+        Returns:
+            tuple: `(origin, delta)` with the new top left coordinates and a dict with
+                - shift (list): `[dx, dy]` in world coordinates, the client scrolls its
+                  view by that much. A positive dy scrolls north, a positive dx east.
+                - rows (list): The rows that scrolled into view, top or bottom
+                  depending on dy.
+                - cols (list): The columns that scrolled into view, read top to bottom,
+                  left or right depending on dx.
+                - cells (list): `[column, row, symbol]` single cells to overwrite after
+                  scrolling, used to move the player marker.
+                `delta` is None when the client needs a full frame instead.
+        """
+        origin = self.get_map_origin(looker)
+        if previous_origin is None:
+            return origin, None
+
+        dx = origin[0] - previous_origin[0]
+        dy = origin[1] - previous_origin[1]
+        if abs(dx) > 1 or abs(dy) > 1:
+            return origin, None
+
+        width = self.VIEW_WIDTH
+        height = self.VIEW_HEIGHT
+        half_width = self.VIEW_HALF_WIDTH
+        half_height = self.VIEW_HALF_HEIGHT
+        view_rows = OverworldMap.get_rect_display(*origin, width, height).split("\n")
+
+        rows = []
+        if dy > 0:
+            rows.append(view_rows[0])
+        elif dy < 0:
+            rows.append(view_rows[-1])
+
+        cols = []
+        if dx > 0:
+            cols.append("".join(row[-1] for row in view_rows))
+        elif dx < 0:
+            cols.append("".join(row[0] for row in view_rows))
+
+        cells = []
+        if dx or dy:
+            # After scrolling, the previous marker lands next to the center
+            previous_x = half_width - dx
+            previous_y = half_height + dy
+            cells.append([previous_x, previous_y, view_rows[previous_y][previous_x]])
+        cells.append([half_width, half_height, "@"])
+
+        return origin, {"shift": [dx, dy], "rows": rows, "cols": cols, "cells": cells}
+
     def at_object_receive(self, moved_obj, source_location, **kwargs):
         return super().at_object_receive(source_location=source_location, moved_obj=moved_obj)
 
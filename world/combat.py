@@ -1,8 +1,9 @@
-import random
-from random import randrange
+from bisect import bisect_left, bisect_right
 from typing import Self, TYPE_CHECKING
 
-from .enums import CombatRange, AttackType
+from .combat_log import CombatEventLog
+from .enums import CombatEvent, CombatMove, CombatRange, AttackType
+from .rng import RandomStream
 
 
 if TYPE_CHECKING:
@@ -11,16 +12,197 @@ if TYPE_CHECKING:
 
 _MAX_RANGE = max([en.value for en in CombatRange])
 
+# The CombatRange of each distance up to _MAX_RANGE, further is always RANGED
+_RANGE_BY_DISTANCE = tuple(
+    next(range_enum for range_enum in CombatRange if range_enum.value >= distance)
+    for distance in range(_MAX_RANGE + 1)
+)
+
+
+def _log_trace(message: str) -> None:
+    # imported here, so combat runs headless without evennia
+    from evennia.utils import logger
+
+    logger.log_trace(message)
+
+
 # format for combat prompt, currently unused
 # health, mana, current attack cooldown
 COMBAT_PROMPT = "HP {hp} - MP {mana} - SP {stamina}"
 
+# seconds between two passes of the combat scheduler
+COMBAT_TICK = 0.5
+# seconds before a fighter can move again in combat
+COMBAT_MOVE_COOLDOWN = 3
+
+
+class PositionIndex(dict):
+    """
+    Positions of the fighters by fighter, which also keeps the fighters sorted by
+    position so range queries are a bisect instead of a scan of every fighter.
+    """
+    __slots__ = ("_positions", "_fighters")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        # parallel lists, sorted by position
+        self._positions = []
+        self._fighters = []
+        self.update(*args, **kwargs)
+
+    def _index_of(self, fighter, position) -> int:
+        index = bisect_left(self._positions, position)
+        while self._fighters[index] is not fighter:
+            index += 1
+
+        return index
+
+    def __setitem__(self, fighter, position):
+        if fighter in self:
+            self._unindex(fighter)
+
+        super().__setitem__(fighter, position)
+        index = bisect_right(self._positions, position)
+        self._positions.insert(index, position)
+        self._fighters.insert(index, fighter)
+
+    def __delitem__(self, fighter):
+        self._unindex(fighter)
+        super().__delitem__(fighter)
+
+    def _unindex(self, fighter):
+        index = self._index_of(fighter, self[fighter])
+        del self._positions[index]
+        del self._fighters[index]
+
+    def pop(self, fighter, *default):
+        if fighter not in self:
+            return super().pop(fighter, *default)
+
+        self._unindex(fighter)
+        return super().pop(fighter)
+
+    def update(self, *args, **kwargs):
+        for fighter, position in dict(*args, **kwargs).items():
+            self[fighter] = position
+
+    def setdefault(self, fighter, position=None):
+        if fighter not in self:
+            self[fighter] = position
+
+        return self[fighter]
+
+    def popitem(self):
+        fighter, position = super().popitem()
+        index = self._index_of(fighter, position)
+        del self._positions[index]
+        del self._fighters[index]
+
+        return fighter, position
+
+    def clear(self):
+        super().clear()
+        self._positions.clear()
+        self._fighters.clear()
+
+    def absorb(self, other: 'PositionIndex') -> None:
+        """
+        Move every fighter of another index, none of which is in this one, into this one.
+        Each of them is inserted where it belongs, so merging a small fight into a large
+        one only costs a bisect per fighter moved.
+        """
+        super().update(other)
+        positions, fighters = self._positions, self._fighters
+        for position, fighter in zip(other._positions, other._fighters):
+            index = bisect_right(positions, position)
+            positions.insert(index, position)
+            fighters.insert(index, fighter)
+        other.clear()
+
+    def count_within(self, position: int, distance: int) -> int:
+        """
+        Amount of fighters at `distance` or closer from `position`.
+        """
+        positions = self._positions
+        return bisect_right(positions, position + distance) - bisect_left(positions, position - distance)
+
+    def within(self, position: int, distance: int) -> list:
+        """
+        Fighters at `distance` or closer from `position`, sorted by position.
+        """
+        positions = self._positions
+        return self._fighters[bisect_left(positions, position - distance):bisect_right(positions, position + distance)]
+
+    def by_distance(self, fighter):
+        """
+        Iterate over the other fighters, closest to `fighter` first.
+        """
+        positions, fighters = self._positions, self._fighters
+        position = self[fighter]
+        index = self._index_of(fighter, position)
+        left, right = index - 1, index + 1
+
+        while left >= 0 or right < len(fighters):
+            if right >= len(fighters) or (left >= 0 and position - positions[left] <= positions[right] - position):
+                yield fighters[left]
+                left -= 1
+            else:
+                yield fighters[right]
+                right += 1
+
+
+class CombatantStats:
+    """
+    Snapshot of the values of a fighter that attacks read, taken when it joins a
+    CombatHandler so attacks don't go through attributes and equipment every time.
+    Health and stamina change all the time and are always read from the fighter.
+
+    Call `CombatHandler.invalidate_stats` when any of these change during combat.
+    """
+    __slots__ = (
+        "strength", "cunning", "will", "aggro", "armor", "shield", "weapon", "can_parry",
+        "min_damage", "max_damage", "stamina_cost", "cooldown", "is_throwable", "attack_range",
+        "attack_type",
+    )
+
+    def __init__(self, fighter: 'BaseCharacter'):
+        self.strength = fighter.strength
+        self.cunning = fighter.cunning
+        self.will = fighter.will
+        self.aggro = fighter.aggro
+        self.armor = fighter.armor
+        self.shield = fighter.shield
+
+        weapon = self.weapon = fighter.weapon
+        if weapon:
+            can_parry = getattr(weapon, "can_parry", None)
+            self.can_parry = bool(can_parry and can_parry())
+            self.min_damage = weapon.min_damage
+            self.max_damage = weapon.max_damage
+            self.stamina_cost = weapon.stamina_cost
+            self.cooldown = weapon.cooldown
+            self.is_throwable = getattr(weapon, "is_throwable", None)
+            self.attack_range = weapon.attack_range or CombatRange.MELEE
+            self.attack_type = weapon.attack_type or AttackType.MELEE
+        else:
+            # "fist" melee weapon stats
+            self.can_parry = False
+            self.min_damage = 1
+            self.max_damage = 2
+            self.stamina_cost = 2
+            self.cooldown = 2
+            self.is_throwable = None
+            self.attack_range = CombatRange.MELEE
+            self.attack_type = AttackType.MELEE
+
 
 class CombatRules:
-    __slots__ = ("handler",)
+    __slots__ = ("handler", "rng")
 
-    def __init__(self, handler: 'CombatHandler'):
+    def __init__(self, handler: 'CombatHandler', rng: RandomStream | None = None):
         self.handler = handler
+        # every fight rolls from its own stream, see world.rng
+        self.rng = rng or RandomStream()
 
     def validate_weapon_attack(self, attacker: 'BaseCharacter', target: 'BaseCharacter', weapon: 'WeaponObject | None' = None) -> bool:
         if not attacker.combat:
@@ -31,7 +213,12 @@ class CombatRules:
             attacker.msg("They are not in combat with you.")
             return False
 
-        if target.is_pc and not (target.location and target.location.allow_pvp):
+        if attacker.location != target.location:
+            attacker.msg(f"{target.get_display_name(attacker)} is not here.")
+            return False
+
+        # NPCs may attack players anywhere
+        if attacker.is_pc and target.is_pc and not (target.location and target.location.allow_pvp):
             attacker.msg("You can't attack another player here.")
             return False
 
@@ -69,6 +256,10 @@ class CombatRules:
         else:
             return CombatRange.MELEE
 
+    def is_enemy(self, fighter: 'BaseCharacter', other: 'BaseCharacter') -> bool:
+        # TODO Fighters of the same alliance should not be enemies, once alliances exist.
+        return other is not fighter
+
     @property
     def is_combat_finished(self) -> bool:
         return len(self.handler.positions) <= 1
@@ -80,9 +271,10 @@ class CombatRules:
         return (attack_location == defense_location)
 
     def get_attack_stamina_cost(self, attacker: 'BaseCharacter', attack_type: AttackType, base_cost: int) -> int:
-        if attacker.aggro == "aggressive":
+        aggro = self.handler.get_stats(attacker).aggro
+        if aggro == "aggressive":
             cost = int(base_cost * 1.5)
-        elif attacker.aggro == "defensive":
+        elif aggro == "defensive":
             cost = int(base_cost / 2)
         else:
             cost = base_cost
@@ -96,18 +288,20 @@ class CombatRules:
         """
         Roll 2d6 + roller's stat +/- roller's aggression + applicable bonuses
         """
-        roll = randrange(1,6) + randrange(1,6)
-        roll += roller.attributes.get(stat, 0)
+        stats = self.handler.get_stats(roller)
+        rng = self.rng
+        roll = rng.randrange(1,6) + rng.randrange(1,6)
+        roll += getattr(stats, stat, 0)
 
         if is_dodge:
-            if roller.aggro == "aggressive":
+            if stats.aggro == "aggressive":
                 roll += -1
-            elif roller.aggro == "defensive":
+            elif stats.aggro == "defensive":
                 roll +=  1
         else:
-            if roller.aggro == "aggressive":
+            if stats.aggro == "aggressive":
                 roll +=  1
-            elif roller.aggro == "defensive":
+            elif stats.aggro == "defensive":
                 roll += -1
 
         # TODO FIXME Add any bonuses this roller has versus the given target
@@ -116,14 +310,200 @@ class CombatRules:
         return roll
 
 
+class CombatMessageBuffer:
+    """
+    Holds the messages sent to rooms while the combat scheduler resolves a tick, so each
+    room can send them as one message per recipient when the tick is over, see
+    `Room.msg_combat_events`. Outside of a tick, messages go out right away.
+    """
+    __slots__ = ("events", "buffering")
+
+    def __init__(self):
+        # location: [(text, exclude, from_obj, mapping), ...], in the order they were sent
+        self.events: dict = {}
+        self.buffering = False
+
+    def add(self, location, text: str, exclude=None, from_obj=None, mapping=None) -> None:
+        events = self.events.get(location)
+        if events is None:
+            events = self.events[location] = []
+
+        events.append((text, exclude, from_obj, mapping))
+
+    def flush(self) -> None:
+        """
+        Stop buffering and send everything which was buffered.
+        """
+        events, self.events = self.events, {}
+        self.buffering = False
+
+        for location, location_events in events.items():
+            self._send(location, location_events)
+
+    def flush_location(self, location) -> None:
+        """
+        Send what was buffered for a location right away, to keep a message which can't be
+        buffered after the ones sent before it. Buffering goes on.
+        """
+        if location_events := self.events.pop(location, None):
+            self._send(location, location_events)
+
+    @staticmethod
+    def _send(location, location_events) -> None:
+        if msg_events := getattr(location, "msg_combat_events", None):
+            msg_events(location_events)
+        else:
+            for text, exclude, from_obj, mapping in location_events:
+                location.msg_contents(text, exclude=exclude, from_obj=from_obj, mapping=mapping)
+
+
+class CombatScheduler:
+    """
+    Collects the actions queued in every CombatHandler and resolves them all in one pass
+    per tick, instead of inside each command. Only the last action queued by a fighter
+    during a tick is kept, so spamming commands costs nothing more than queueing them.
+    Fights with NPCs are watched, their NPCs get their actions planned on every tick,
+    see `world.combat_ai`.
+
+    The tick only runs while actions are waiting or fights are watched.
+    """
+    __slots__ = ("pending", "watched", "messages", "interval", "autostart", "_loop")
+
+    def __init__(self, interval: float = COMBAT_TICK, autostart: bool = True):
+        """
+        Args:
+            interval (float, optional): Seconds between two ticks.
+            autostart (bool, optional): Start ticking on the reactor when an action gets queued.
+                Without it, `tick` has to be called manually, as in headless combat.
+        """
+        self.pending: dict['CombatHandler', dict['BaseCharacter', tuple[AttackType | CombatMove, 'BaseCharacter']]] = {}
+        self.watched: set['CombatHandler'] = set()
+        self.messages = CombatMessageBuffer()
+        self.interval = interval
+        self.autostart = autostart
+        self._loop = None
+
+    def queue(
+        self, handler: 'CombatHandler', actor: 'BaseCharacter', action: AttackType | CombatMove, target: 'BaseCharacter'
+    ) -> None:
+        """
+        Queue an action to resolve on the next tick, replacing the one the actor already queued.
+        """
+        actions = self.pending.get(handler)
+        if actions is None:
+            actions = self.pending[handler] = {}
+
+        actions[actor] = (action, target)
+        if self.autostart:
+            self.start()
+
+    def watch(self, handler: 'CombatHandler') -> None:
+        """
+        Plan the actions of the NPCs of a fight on every tick, until it ends.
+        """
+        self.watched.add(handler)
+        if self.autostart:
+            self.start()
+
+    def tick(self) -> None:
+        """
+        Plan the actions of NPCs in watched fights, resolve them with every queued action,
+        then check each handler once for the end of its combat. Room messages sent
+        meanwhile are buffered and go out together at the end.
+        """
+        pending, self.pending = self.pending, {}
+        watched, self.watched = self.watched, set()
+        self.messages.buffering = True
+        try:
+            # fights may have been merged into others since queueing
+            watched = {handler.find() for handler in watched}
+            handlers = {handler: {} for handler in watched}
+            for handler, actions in pending.items():
+                handlers.setdefault(handler.find(), {}).update(actions)
+
+            for handler, actions in handlers.items():
+                # one broken fight must not stop the others, nor the tick itself
+                try:
+                    self._resolve(handler, actions, handler in watched)
+                except Exception:
+                    _log_trace(f"Combat tick failed for {handler}.")
+        finally:
+            self.messages.flush()
+
+        if not self.pending and not self.watched:
+            self.stop()
+
+    def _resolve(self, handler: 'CombatHandler', actions: dict, watched: bool) -> None:
+        """
+        Resolve the actions of one fight during a tick, planning its NPCs first if it is watched.
+        """
+        if watched:
+            for actor, action, target in handler.plan_actions():
+                # what was queued for an NPC goes first
+                actions.setdefault(actor, (action, target))
+
+        for actor, (action, target) in actions.items():
+            # the actor may have died or fled since queueing
+            if actor.combat is handler:
+                handler.resolve_action(actor, action, target)
+
+        handler.update()
+        if handler.positions and any(not fighter.is_pc for fighter in handler.positions):
+            self.watched.add(handler)
+
+    def start(self) -> None:
+        if self._loop is None:
+            from twisted.internet.task import LoopingCall
+
+            self._loop = LoopingCall(self.tick)
+            self._loop.start(self.interval, now=False).addErrback(self._at_loop_error)
+
+    def _at_loop_error(self, failure) -> None:
+        """
+        The tick raised and its loop stopped. Log it and start a new loop if fights are
+        still waiting, otherwise the next queued action or watched fight starts one.
+        """
+        from evennia.utils import logger
+
+        logger.log_err(f"Combat scheduler stopped: {failure.getTraceback()}")
+        self._loop = None
+        if self.pending or self.watched:
+            self.start()
+
+    def stop(self) -> None:
+        if self._loop is not None:
+            if self._loop.running:
+                self._loop.stop()
+            self._loop = None
+
+
+combat_scheduler = CombatScheduler()
+
+
 class CombatHandler:
-    __slots__ = ('positions', 'rules')
+    """
+    A fight between fighters. Fights which meet are merged as in a disjoint-set: the
+    smaller one points to the larger one, which takes its fighters. Fighters still
+    referencing the smaller one find the larger one through `find`.
+    """
+    __slots__ = ('positions', 'rules', 'stats', 'parent', 'log')
 
     rules_class = CombatRules
-
-    def __init__(self, attacker: 'BaseCharacter', target: 'BaseCharacter', custom_rules: type(CombatRules) | None = None):
-        self.rules = custom_rules(self) if custom_rules else self.rules_class(self)
-        self.positions: dict['BaseCharacter', CombatRange] = {}
+    scheduler = combat_scheduler
+
+    def __init__(
+        self,
+        attacker: 'BaseCharacter',
+        target: 'BaseCharacter',
+        custom_rules: type(CombatRules) | None = None,
+        rng: RandomStream | None = None,
+    ):
+        self.rules = custom_rules(self, rng) if custom_rules else self.rules_class(self, rng)
+        self.positions: PositionIndex = PositionIndex()
+        self.stats: dict['BaseCharacter', CombatantStats] = {}
+        # the handler this one was merged into
+        self.parent: Self | None = None
+        self.log = CombatEventLog()
         self.add(attacker)
         self.add(target)
 
@@ -136,8 +516,7 @@ class CombatHandler:
         target_combat: Self = target.combat
 
         if attacker_combat and target_combat and attacker_combat != target_combat:
-            attacker_combat.merge(target.combat)
-            return attacker_combat
+            return attacker_combat.merge(target_combat)
 
         elif attacker_combat:
             attacker_combat.add(target)
@@ -157,7 +536,12 @@ class CombatHandler:
         assert fighter not in self.positions, f"Fighter {fighter} was already added to the fight!"
 
         self.positions[fighter] = self.rules.get_initial_position(fighter)
+        self.stats[fighter] = CombatantStats(fighter)
         fighter.combat = self
+        self.log.record(CombatEvent.JOIN, fighter, value=fighter.hp)
+
+        if not fighter.is_pc:
+            self.scheduler.watch(self)
 
     def remove(self, fighter: 'BaseCharacter') -> None:
         """
@@ -167,6 +551,8 @@ class CombatHandler:
 
 
         del self.positions[fighter]
+        self.stats.pop(fighter, None)
+        self.log.record(CombatEvent.LEAVE, fighter)
         if fighter.combat == self:
             fighter.combat = None
 
@@ -174,20 +560,100 @@ class CombatHandler:
             self.end_combat()
 
 
-    def merge(self, other):
+    def find(self) -> Self:
+        """
+        Get the handler this one was merged into, if any, or itself. Handlers along the
+        way are pointed straight to it, so the next lookups are shorter.
+        """
+        root = self
+        while root.parent is not None:
+            root = root.parent
+
+        handler = self
+        while handler.parent is not None and handler.parent is not root:
+            handler.parent, handler = root, handler.parent
+
+        return root
+
+    def merge(self, other: Self) -> Self:
         """
-        Merge another combat instance into this one
+        Merge two combat instances. The fighters of the smaller one move to the larger
+        one, their `combat` is left alone and resolves to it through `find`.
+
+        Returns:
+            CombatHandler: The handler both fights now share.
         """
-        self.positions.update(other.positions)
-        for obj in other.positions.keys():
-            obj.combat = self
+        root, other = self.find(), other.find()
+        if root is other:
+            return root
 
-        other.positions = {}
+        if len(root.positions) < len(other.positions):
+            root, other = other, root
+
+        for fighter, position in other.positions.items():
+            root.log.record(CombatEvent.JOIN, fighter, value=fighter.hp)
+            root.log.record(CombatEvent.MOVE, fighter, value=position)
+        root.positions.absorb(other.positions)
+        root.stats.update(other.stats)
+        other.stats = {}
+        other.parent = root
+
+        return root
 
     def update(self):
         if self.is_finished:
             self.end_combat()
 
+    def queue_action(self, actor: 'BaseCharacter', action: AttackType | CombatMove, target: 'BaseCharacter') -> None:
+        """
+        Queue an attack of the given type or a movement, resolved on the next combat tick.
+        """
+        self.scheduler.queue(self, actor, action, target)
+
+    def plan_actions(self) -> list[tuple['BaseCharacter', AttackType | CombatMove, 'BaseCharacter']]:
+        """
+        Choose the actions of all NPCs in this fight, see `world.combat_ai`.
+        """
+        from .combat_ai import combat_planner
+
+        return combat_planner.plan(self)
+
+    def resolve_action(self, actor: 'BaseCharacter', action: AttackType | CombatMove, target: 'BaseCharacter') -> None:
+        """
+        Validate a queued action again, things may have changed since it was queued, then resolve it.
+        """
+        if isinstance(action, CombatMove):
+            self.resolve_move(actor, action, target)
+            return
+
+        if not self.rules.validate_weapon_attack(actor, target, actor.weapon):
+            return
+
+        if action == AttackType.RANGED:
+            self.at_ranged_attack(actor, target)
+        elif action == AttackType.THROWN:
+            self.at_thrown_attack(actor, target)
+        else:
+            self.at_melee_attack(actor, target)
+
+    def resolve_move(self, mover: 'BaseCharacter', action: CombatMove, target: 'BaseCharacter') -> None:
+        """
+        Move towards or away from target, unless the mover moved too recently.
+        """
+        if target not in self.positions or not mover.cooldowns.ready("combat_move"):
+            return
+
+        if action == CombatMove.APPROACH:
+            moved = self.approach(mover, target)
+            text = "$You() $conj(advance) towards {target}."
+        else:
+            moved = self.retreat(mover, target)
+            text = "$You() $conj(retreat) from {target}."
+
+        if moved:
+            mover.cooldowns.add("combat_move", COMBAT_MOVE_COOLDOWN)
+            mover.location.msg_contents(text, mapping={"target": target}, from_obj=mover)
+
     def end_combat(self) -> None:
         for fighter in self.positions:
             if fighter.combat == self:
@@ -197,7 +663,27 @@ class CombatHandler:
                 # Temporary message for debugging
                 fighter.msg("You are victorious!")
 
-        self.positions = {}
+        self.positions = PositionIndex()
+        self.stats = {}
+
+    def get_stats(self, fighter: 'BaseCharacter') -> CombatantStats:
+        """
+        Get the stats snapshot of a fighter, taking a new one if it was invalidated.
+        """
+        stats = self.stats.get(fighter)
+        if stats is None:
+            stats = CombatantStats(fighter)
+            # don't keep snapshots of fighters outside of this combat
+            if fighter in self.positions:
+                self.stats[fighter] = stats
+
+        return stats
+
+    def invalidate_stats(self, fighter: 'BaseCharacter') -> None:
+        """
+        Drop the stats snapshot of a fighter, after its equipment or stats changed.
+        """
+        self.stats.pop(fighter, None)
 
     @property
     def is_finished(self) -> bool:
@@ -211,11 +697,10 @@ class CombatHandler:
         assert target in self.positions, f"Target {target} is not in combat!"
 
         distance = abs(self.positions[attacker] - self.positions[target])
-        for range_enum in CombatRange:
-            if range_enum.value >= distance:
-                return range_enum
+        if distance > _MAX_RANGE:
+            return CombatRange.RANGED
 
-        return CombatRange.RANGED
+        return _RANGE_BY_DISTANCE[distance]
 
     def in_range(self, attacker: 'BaseCharacter', target: 'BaseCharacter', combat_range: CombatRange) -> bool:
         """Check if target is within the specified range of attacker."""
@@ -229,12 +714,38 @@ class CombatHandler:
     def any_in_range(self, attacker: 'BaseCharacter', combat_range: CombatRange) -> bool:
         assert attacker in self.positions, f"Attacker {attacker} is not in combat!"
 
-        a_pos = self.positions[attacker]
+        # the attacker is always within range of itself
+        return self.positions.count_within(self.positions[attacker], combat_range) > 1
+
+    def enemies_in_range(self, fighter: 'BaseCharacter', combat_range: CombatRange) -> list['BaseCharacter']:
+        """
+        All enemies of fighter within the given range and in its room, sorted by position.
+        """
+        assert fighter in self.positions, f"Fighter {fighter} is not in combat!"
+
+        is_enemy = self.rules.is_enemy
+        location = fighter.location
+        return [
+            other
+            for other in self.positions.within(self.positions[fighter], combat_range)
+            if is_enemy(fighter, other) and other.location == location
+        ]
 
-        return any(
-            p
-            for c, p in self.positions.items()
-            if abs(a_pos - p) <= combat_range and c != attacker
+    def nearest_enemy(self, fighter: 'BaseCharacter') -> 'BaseCharacter | None':
+        """
+        The enemy of fighter in its room closest to it, None if it has none.
+        """
+        assert fighter in self.positions, f"Fighter {fighter} is not in combat!"
+
+        is_enemy = self.rules.is_enemy
+        location = fighter.location
+        return next(
+            (
+                other
+                for other in self.positions.by_distance(fighter)
+                if is_enemy(fighter, other) and other.location == location
+            ),
+            None,
         )
 
     def approach(self, mover: 'BaseCharacter', target: 'BaseCharacter') -> bool:
@@ -254,6 +765,7 @@ class CombatHandler:
 
         change = 1 if start < end else -1
         self.positions[mover] += change
+        self.log.record(CombatEvent.MOVE, mover, value=self.positions[mover])
 
         return True
 
@@ -274,6 +786,7 @@ class CombatHandler:
 
         change = -1 if start < end else 1
         self.positions[mover] += change
+        self.log.record(CombatEvent.MOVE, mover, value=self.positions[mover])
 
         return True
 
@@ -285,33 +798,30 @@ class CombatHandler:
         """
         blocked = False
         parried = False
-        weapon = attacker.weapon
+        attacker_stats = self.get_stats(attacker)
+        target_stats = self.get_stats(target)
+        weapon = attacker_stats.weapon
         range_to_target = self.get_range(attacker, target)
 
-        # Make sure the attacker has a basic weapon, if not, default to "fist" melee weapon stats
-        if weapon:
-            min_damage = weapon.min_damage
-            max_damage = weapon.max_damage
-            stamina_cost = weapon.stamina_cost
-            cooldown = weapon.cooldown
-        else:
-            min_damage = 1
-            max_damage = 2
-            stamina_cost = 2
-            cooldown = 2
+        # Without a weapon, the attacker fights with the "fist" melee weapon stats
+        min_damage = attacker_stats.min_damage
+        max_damage = attacker_stats.max_damage
+        stamina_cost = attacker_stats.stamina_cost
+        cooldown = attacker_stats.cooldown
 
         attacker_stamina_cost = self.rules.get_attack_stamina_cost(attacker, AttackType.MELEE, stamina_cost)
         attacker.spend_stamina(attacker_stamina_cost)
         attacker.cooldowns.add("attack", cooldown)
+        self.log.record(CombatEvent.ATTACK, attacker, target, AttackType.MELEE)
 
         # Check to see if the target is using a shield
         #   their Block zone matches the Attacker's target zone
-        if target.shield is not None:
+        if target_stats.shield is not None:
             blocked = True
 
         # Check if target is wielding something that can parry,
         #    and if their Parry zone matches the Attacker's target zone.
-        if target.weapon is not None and target.weapon.can_parry():
+        if target_stats.can_parry:
             parried = True
 
         if blocked or parried:
@@ -328,10 +838,11 @@ class CombatHandler:
                     attacker.cooldowns.add("attack", cooldown + 1)
                     target.buffs.add_buff("attack", 2, versus=attacker, duration=1)
 
+                self.log.record(CombatEvent.BLOCK, target, attacker)
                 if blocked:
-                    blocking_item = target.shield
+                    blocking_item = target_stats.shield
                 else:
-                    blocking_item = target.weapon
+                    blocking_item = target_stats.weapon
 
                 target.location.msg_contents(
                     "$You() $conj(block) the attack with $pron(your) {blocking_item}.",
@@ -343,22 +854,23 @@ class CombatHandler:
         attack_roll = self.rules.roll(attacker, target, "strength")
         defense_roll = self.rules.roll(target, attacker, "cunning", is_dodge=True)
         if attack_roll >= defense_roll:
-            damage = random.randrange(min_damage, max_damage)
-            damage += attacker.strength
+            damage = self.rules.rng.randrange(min_damage, max_damage)
+            damage += attacker_stats.strength
 
             # multiply the result by the Attackers Aggression factor (round up)
-            if attacker.aggro == "defensive":
+            if attacker_stats.aggro == "defensive":
                 damage = int(damage / 2)
-            elif attacker.aggro == "aggressive":
+            elif attacker_stats.aggro == "aggressive":
                 damage = int(damage * 1.5)
 
             # Subtract off the Target's armor, if any.
-            if target.armor:
-                damage = damage - target.armor
+            if target_stats.armor:
+                damage = damage - target_stats.armor
                 if damage <= 0:
+                    self.log.record(CombatEvent.ABSORB, target, attacker)
                     attacker.location.msg_contents(
                         "$pron(your) attack fails to pierce {target}'s {armor}.",
-                        mapping={"target": target, "armor": target.armor},
+                        mapping={"target": target, "armor": target_stats.armor},
                         from_obj=attacker,
                     )
                     return
@@ -369,10 +881,14 @@ class CombatHandler:
                 mapping={"target": target, "weapon": weapon or "fists"},
                 from_obj=attacker,
             )
+            self.log.record(CombatEvent.HIT, attacker, target, damage)
+            if damage >= target.hp:
+                self.log.record(CombatEvent.DEFEAT, target, attacker)
             target.at_damage(damage)
 
             return damage
         else:
+            self.log.record(CombatEvent.DODGE, target, attacker)
             target.location.msg_contents(
                 "$You() $conj(dodge) the attack.",
                 from_obj=target,
@@ -386,25 +902,28 @@ class CombatHandler:
 
         blocked = False
         parried = False
+        attacker_stats = self.get_stats(attacker)
+        target_stats = self.get_stats(target)
         range_to_target = self.get_range(attacker, target)
-        weapon = attacker.weapon
-        min_damage = weapon.min_damage
-        max_damage = weapon.max_damage
-        stamina_cost = weapon.stamina_cost
-        cooldown = weapon.cooldown
+        weapon = attacker_stats.weapon
+        min_damage = attacker_stats.min_damage
+        max_damage = attacker_stats.max_damage
+        stamina_cost = attacker_stats.stamina_cost
+        cooldown = attacker_stats.cooldown
 
         attacker_stamina_cost = self.rules.get_attack_stamina_cost(attacker, AttackType.RANGED, stamina_cost)
         attacker.spend_stamina(attacker_stamina_cost)
         attacker.cooldowns.add("attack", cooldown)
+        self.log.record(CombatEvent.ATTACK, attacker, target, AttackType.RANGED)
 
         # Check to see if the target is using a shield
         #   their Block zone matches the Attacker's target zone
-        if target.shield is not None:
+        if target_stats.shield is not None:
             blocked = True
 
         # Check if target is wielding something that can parry,
         #    and if their Parry zone matches the Attacker's target zone.
-        if target.weapon is not None and target.weapon.can_parry():
+        if target_stats.can_parry:
             parried = True
 
         if blocked or parried:
@@ -419,12 +938,13 @@ class CombatHandler:
                 target.spend_stamina(target_defense_stamina_cost)
                 if range_to_target == CombatRange.MELEE:
                     attacker.cooldowns.add("attack", cooldown + 1)
-                    target.add_buff("attack", 2, versus=attacker, duration=1)
+                    target.buffs.add_buff("attack", 2, versus=attacker, duration=1)
 
+                self.log.record(CombatEvent.BLOCK, target, attacker)
                 if blocked:
-                    blocking_item = target.shield
+                    blocking_item = target_stats.shield
                 else:
-                    blocking_item = target.weapon
+                    blocking_item = target_stats.weapon
 
                 target.location.msg_contents(
                     "$You() $conj(block) the attack with $pron(your) {blocking_item}.",
@@ -443,22 +963,23 @@ class CombatHandler:
 
         defense_roll = 5 + target_size_penalty + range_penalty
         if attack_roll >= defense_roll:
-            damage = random.randrange(min_damage, max_damage)
-            damage += attacker.strength
+            damage = self.rules.rng.randrange(min_damage, max_damage)
+            damage += attacker_stats.strength
 
             # multiply the result by the Attackers Aggression factor (round up)
-            if attacker.aggro == "defensive":
+            if attacker_stats.aggro == "defensive":
                 damage = int(damage / 2)
-            elif attacker.aggro == "aggressive":
+            elif attacker_stats.aggro == "aggressive":
                 damage = int(damage * 1.5)
 
             # Subtract off the Target's armor, if any.
-            if target.armor:
-                damage = damage - target.armor
+            if target_stats.armor:
+                damage = damage - target_stats.armor
                 if damage <= 0:
+                    self.log.record(CombatEvent.ABSORB, target, attacker)
                     attacker.location.msg_contents(
                         "$pron(your) attack fails to pierce {target}'s {armor}.",
-                        mapping={"target": target, "armor": target.armor},
+                        mapping={"target": target, "armor": target_stats.armor},
                         from_obj=attacker,
                     )
                     return
@@ -469,10 +990,14 @@ class CombatHandler:
                 mapping={"target": target, "weapon": weapon},
                 from_obj=attacker,
             )
+            self.log.record(CombatEvent.HIT, attacker, target, damage)
+            if damage >= target.hp:
+                self.log.record(CombatEvent.DEFEAT, target, attacker)
             target.at_damage(damage)
 
             return damage
         else:
+            self.log.record(CombatEvent.DODGE, target, attacker)
             target.location.msg_contents(
                 "$You() $conj(dodge) the attack.",
                 from_obj=target,
@@ -481,33 +1006,36 @@ class CombatHandler:
     def at_thrown_attack(self, attacker, target):
         blocked = False
         parried = False
+        attacker_stats = self.get_stats(attacker)
+        target_stats = self.get_stats(target)
         range_to_target = self.get_range(attacker, target)
-        weapon = attacker.weapon
+        weapon = attacker_stats.weapon
 
-        if attacker.weapon.is_throwable is not None:
+        if attacker_stats.is_throwable is not None:
             # set the Base Physical Damage Range to 1-2 and the Base Stamina Cost to 4.
             min_damage = 1
             max_damage = 2
             stamina_cost = 4
             cooldown = 4
         else:
-            min_damage = weapon.min_damage
-            max_damage = weapon.max_damage
-            stamina_cost = weapon.stamina_cost
-            cooldown = weapon.cooldown
+            min_damage = attacker_stats.min_damage
+            max_damage = attacker_stats.max_damage
+            stamina_cost = attacker_stats.stamina_cost
+            cooldown = attacker_stats.cooldown
 
         attacker_stamina_cost = self.rules.get_attack_stamina_cost(attacker, AttackType.THROWN, stamina_cost)
         attacker.spend_stamina(attacker_stamina_cost)
         attacker.cooldowns.add("attack", cooldown)
+        self.log.record(CombatEvent.ATTACK, attacker, target, AttackType.THROWN)
 
         # Check to see if the target is using a shield
         #   their Block zone matches the Attacker's target zone
-        if target.shield is not None:
+        if target_stats.shield is not None:
             blocked = True
 
         # Check if target is wielding something that can parry,
         #    and if their Parry zone matches the Attacker's target zone.
-        if target.weapon is not None and target.weapon.can_parry():
+        if target_stats.can_parry:
             parried = True
 
         if blocked or parried:
@@ -522,12 +1050,13 @@ class CombatHandler:
                 target.spend_stamina(target_defense_stamina_cost)
                 if range_to_target == CombatRange.MELEE:
                     attacker.cooldowns.add("attack", cooldown + 1)
-                    target.add_buff("attack", 2, versus=attacker, duration=1)
+                    target.buffs.add_buff("attack", 2, versus=attacker, duration=1)
 
+                self.log.record(CombatEvent.BLOCK, target, attacker)
                 if blocked:
-                    blocking_item = target.shield
+                    blocking_item = target_stats.shield
                 else:
-                    blocking_item = target.weapon
+                    blocking_item = target_stats.weapon
 
                 target.location.msg_contents(
                     "$You() $conj(block) the attack with $pron(your) {blocking_item}.",
@@ -546,22 +1075,23 @@ class CombatHandler:
 
         defense_roll = 5 + target_size_penalty + range_penalty
         if attack_roll >= defense_roll:
-            damage = random.randrange(min_damage, max_damage)
-            damage += attacker.cunning
+            damage = self.rules.rng.randrange(min_damage, max_damage)
+            damage += attacker_stats.cunning
 
             # multiply the result by the Attackers Aggression factor (round up)
-            if attacker.aggro == "defensive":
+            if attacker_stats.aggro == "defensive":
                 damage = int(damage / 2)
-            elif attacker.aggro == "aggressive":
+            elif attacker_stats.aggro == "aggressive":
                 damage = int(damage * 1.5)
 
             # Subtract off the Target's armor, if any.
-            if target.armor:
-                damage = damage - target.armor
+            if target_stats.armor:
+                damage = damage - target_stats.armor
                 if damage <= 0:
+                    self.log.record(CombatEvent.ABSORB, target, attacker)
                     attacker.location.msg_contents(
                         "$pron(your) attack fails to pierce {target}'s {armor}.",
-                        mapping={"target": target, "armor": target.armor},
+                        mapping={"target": target, "armor": target_stats.armor},
                         from_obj=attacker,
                     )
                     return
@@ -572,10 +1102,14 @@ class CombatHandler:
                 mapping={"target": target, "weapon": weapon},
                 from_obj=attacker,
             )
+            self.log.record(CombatEvent.HIT, attacker, target, damage)
+            if damage >= target.hp:
+                self.log.record(CombatEvent.DEFEAT, target, attacker)
             target.at_damage(damage)
 
             return damage
         else:
+            self.log.record(CombatEvent.DODGE, target, attacker)
             target.location.msg_contents(
                 "$You() $conj(dodge) the attack.",
                 from_obj=target,
@@ -0,0 +1,157 @@
+"""
+Combat AI
+
+Plans the actions of every NPC of a fight at once. On each combat tick, the planner
+builds a single `CombatView` of the fight, with what the NPCs need to know about it:
+positions, health ratios and threat. It then asks the policy of each NPC for its next
+action, all of them reading that same view.
+
+A policy is a function `policy(view, fighter)` returning an `(action, target)` tuple,
+or None to do nothing this tick. NPCs pick theirs with their `ai_combat_policy`
+attribute, new ones are added with `combat_planner.register`.
+
+"""
+
+from .enums import AttackType, CombatMove, CombatRange
+from .odds import expected_damage
+
+DEFAULT_POLICY = "aggressive"
+
+# Cautious fighters back away from their biggest threat below this much health
+FLEE_HP_RATIO = 0.25
+
+
+class CombatView:
+    """
+    What NPCs know about a fight during one tick, computed once for all of them.
+    """
+    __slots__ = ("handler", "stats", "hp_ratio", "threat", "is_enemy")
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.is_enemy = handler.rules.is_enemy
+        self.stats = {}
+        self.hp_ratio = {}
+        self.threat = {}
+
+        for fighter in handler.positions:
+            stats = self.stats[fighter] = handler.get_stats(fighter)
+            hp_max = fighter.hp_max
+            self.hp_ratio[fighter] = fighter.hp / hp_max if hp_max else 0
+            # average damage of one of its attacks which lands
+            self.threat[fighter] = expected_damage(stats.min_damage, stats.max_damage, stats.strength, stats.aggro)
+
+    def enemies_in_range(self, fighter, combat_range):
+        return self.handler.enemies_in_range(fighter, combat_range)
+
+    def nearest_enemy(self, fighter):
+        return self.handler.nearest_enemy(fighter)
+
+    def weakest_enemy_in_range(self, fighter, combat_range):
+        """
+        The enemy within range with the lowest health ratio, None if there is none.
+        """
+        return min(self.enemies_in_range(fighter, combat_range), key=self.hp_ratio.__getitem__, default=None)
+
+    def biggest_threat_in_range(self, fighter, combat_range):
+        """
+        The enemy within range dealing the most damage, None if there is none.
+        """
+        return max(self.enemies_in_range(fighter, combat_range), key=self.threat.__getitem__, default=None)
+
+
+def aggressive_policy(view, fighter):
+    """
+    Attack the weakest enemy within reach of the weapon, or close in on the nearest one.
+    """
+    stats = view.stats[fighter]
+    if target := view.weakest_enemy_in_range(fighter, stats.attack_range):
+        return stats.attack_type, target
+
+    if target := view.nearest_enemy(fighter):
+        return CombatMove.APPROACH, target
+
+    return None
+
+
+def cautious_policy(view, fighter):
+    """
+    Back away from the biggest threat when badly hurt, fight like the aggressive policy otherwise.
+    """
+    if view.hp_ratio[fighter] < FLEE_HP_RATIO:
+        if threat := view.biggest_threat_in_range(fighter, CombatRange.MELEE):
+            return CombatMove.RETREAT, threat
+
+    return aggressive_policy(view, fighter)
+
+
+def idle_policy(view, fighter):
+    """
+    Do nothing.
+    """
+    return None
+
+
+class CombatPlanner:
+    """
+    Chooses the actions of all NPCs of a fight.
+    """
+
+    def __init__(self):
+        self.policies = {
+            "aggressive": aggressive_policy,
+            "cautious": cautious_policy,
+            "idle": idle_policy,
+        }
+
+    def register(self, name, policy):
+        """
+        Make a policy available to NPCs with `ai_combat_policy` set to `name`.
+        """
+        self.policies[name] = policy
+
+    def get_policy(self, fighter):
+        policies = self.policies
+        return policies.get(getattr(fighter, "ai_combat_policy", None), policies[DEFAULT_POLICY])
+
+    def plan(self, handler):
+        """
+        Choose the actions of the NPCs of a fight for this tick. NPCs which can't attack
+        yet don't get attacks planned.
+
+        Args:
+            handler (CombatHandler): The fight.
+
+        Returns:
+            list: `(npc, action, target)` tuples, action being an AttackType or a CombatMove.
+        """
+        npcs = [fighter for fighter in handler.positions if not fighter.is_pc]
+        if not npcs:
+            return []
+
+        view = CombatView(handler)
+        actions = []
+        for npc in npcs:
+            if not (action := self.get_policy(npc)(view, npc)):
+                continue
+            # it would only be told to wait, try again on a later tick
+            if isinstance(action[0], AttackType) and not npc.cooldowns.ready("attack"):
+                continue
+            actions.append((npc, *action))
+
+        return actions
+
+    def next_action(self, fighter):
+        """
+        Choose the action of a single fighter, outside of a combat tick.
+
+        Returns:
+            tuple or None: `(action, target)`, None if it does nothing or is not fighting.
+        """
+        if not (combat := fighter.combat):
+            return None
+
+        return self.get_policy(fighter)(CombatView(combat), fighter)
+
+
+combat_planner = CombatPlanner()
@@ -0,0 +1,347 @@
+"""
+Combat balance simulator
+
+Runs many melee duels at once with numpy, instead of one `randrange` at a time, to compare
+classes, races, weapons and aggro modes. The rules mirror `CombatHandler.at_melee_attack`
+and `CombatRules.roll`:
+
+- attacking costs the weapon's stamina cost, modified by aggro, and is not possible
+  when that cost is not below the remaining stamina.
+- a target with a shield or a weapon which can parry blocks the attack as long as it has
+  more stamina than the defense cost, which adds 1 second to the attacker's cooldown.
+- otherwise both roll 2d5 (`randrange(1, 6)` twice) plus strength for the attacker and
+  cunning for the defender, with +1/-1 for aggressive/defensive fighters, dodging the other way.
+- damage is the weapon damage plus strength, halved when defensive, 1.5x when aggressive,
+  minus the target's armor.
+
+Stamina recovers like `BaseCharacter.at_recovery` every RECOVERY_INTERVAL seconds.
+
+    from world.combat_balance import Combatant, simulate_duel
+
+    warrior = Combatant.from_prototypes("warrior", "human", weapon="weapon_sword_common")
+    rogue = Combatant.from_prototypes("rogue", "elf", weapon="weapon_dagger_common", aggro="aggressive")
+    simulate_duel(warrior, rogue, fights=100_000, seed=1).summary()
+
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+from scipy import stats
+
+from world.characters.classes import CharacterClasses
+from world.characters.races import Races
+from world.common import item_prototypes
+from world.enums import WieldLocation
+
+RECOVERY_INTERVAL = 6  # GlobalRecoveryScript interval, see at_initial_setup
+DEFENSE_STAMINA_COST = 2  # CombatRules.get_defense_stamina_cost
+
+
+@lru_cache(maxsize=None)
+def get_item_prototype(prototype_key):
+    """
+    Get an item prototype from `world.common.item_prototypes`, merged with its parents.
+    This avoids going through the spawner, which needs the database.
+
+    Args:
+        prototype_key (str): Key of the prototype.
+
+    Returns:
+        dict: The flattened prototype.
+    """
+    prototypes = {
+        value["prototype_key"]: value
+        for value in vars(item_prototypes).values()
+        if isinstance(value, dict) and "prototype_key" in value
+    }
+    if prototype_key not in prototypes:
+        raise KeyError(f"Unknown item prototype {prototype_key}.")
+
+    chain = []
+    while prototype_key:
+        prototype = prototypes[prototype_key]
+        chain.append(prototype)
+        prototype_key = prototype.get("prototype_parent")
+
+    flattened = {}
+    for prototype in reversed(chain):
+        flattened.update(prototype)
+
+    return flattened
+
+
+@dataclass(frozen=True)
+class Combatant:
+    """
+    The values of a fighter which matter in melee, fists by default.
+    """
+    name: str = "fighter"
+    hp: int = 10
+    stamina: int = 10
+    strength: int = 1
+    cunning: int = 1
+    aggro: str = "n"
+    armor: int = 1
+    shield: bool = False
+    can_parry: bool = False
+    min_damage: int = 1
+    max_damage: int = 2
+    stamina_cost: int = 2
+    cooldown: int = 2
+
+    @classmethod
+    def from_prototypes(cls, cclass_key, race_key, weapon=None, armor=(), aggro="n", name=None):
+        """
+        Build a combatant the way character generation does: 3 in the class' primary stat,
+        2 in its secondary one, 1 otherwise, plus race modifiers, and 10 + the highest roll
+        of the class dice for health and stamina.
+
+        Args:
+            cclass_key (str): Key of the character class.
+            race_key (str): Key of the race.
+            weapon (str, optional): Prototype key of the weapon, fists if not given.
+            armor (iterable, optional): Prototype keys of the body armor, shield and helmet.
+            aggro (str, optional): "aggressive", "defensive" or anything else for normal.
+            name (str, optional): Name of the combatant, defaults to the class and weapon.
+        """
+        cclass = CharacterClasses.get(cclass_key)
+        race = Races.get(race_key)
+
+        abilities = {"strength": 1, "cunning": 1, "will": 1}
+        abilities[cclass.primary_stat] = 3
+        abilities[cclass.secondary_stat] = 2
+
+        values = {}
+        if weapon:
+            # defaults of WeaponObject
+            prototype = get_item_prototype(weapon)
+            values = {
+                "min_damage": prototype.get("min_damage", 1),
+                "max_damage": prototype.get("max_damage", 4),
+                "stamina_cost": prototype.get("stamina_cost", 2),
+                "cooldown": prototype.get("cooldown", 2),
+                "can_parry": bool(prototype.get("can_parry", False)),
+            }
+
+        # body armor counts as 1 when none is worn, like EquipmentHandler.armor
+        slots = {WieldLocation.BODY: 1}
+        for key in armor:
+            prototype = get_item_prototype(key)
+            slots[prototype["inventory_use_slot"]] = prototype.get("armor", 1)
+
+        return cls(
+            name=name or f"{race_key} {cclass_key} ({weapon or 'fists'})",
+            hp=10 + cclass.health_dice[1],
+            stamina=10 + cclass.stamina_dice[1],
+            strength=abilities["strength"] + race.strength_mod,
+            cunning=abilities["cunning"] + race.cunning_mod,
+            aggro=aggro,
+            armor=sum(slots.values()),
+            shield=WieldLocation.SHIELD_HAND in slots,
+            **values,
+        )
+
+    @property
+    def attack_stamina_cost(self):
+        if self.aggro == "aggressive":
+            return int(self.stamina_cost * 1.5)
+        elif self.aggro == "defensive":
+            return int(self.stamina_cost / 2)
+        return self.stamina_cost
+
+    @property
+    def attack_modifier(self):
+        return {"aggressive": 1, "defensive": -1}.get(self.aggro, 0)
+
+
+@dataclass(frozen=True)
+class DuelResult:
+    """
+    Per fight outcomes of `simulate_duel`. Arrays with two rows are indexed by side,
+    0 for the first combatant and 1 for the second one.
+    """
+    combatants: tuple[Combatant, Combatant]
+    winner: np.ndarray  # side which won each fight, -1 if nobody did before max_time
+    duration: np.ndarray  # seconds until the fight ended
+    damage: np.ndarray  # damage dealt by each side
+    attacks: np.ndarray  # attacks made by each side
+    hits: np.ndarray  # attacks which beat the defense roll
+    blocks: np.ndarray  # attacks each side blocked or parried
+
+    def hit_rate(self, side):
+        """Fraction of attacks of each fight which were hits."""
+        return self.hits[side] / np.maximum(self.attacks[side], 1)
+
+    def dps(self, side):
+        """Damage per second dealt in each fight."""
+        return self.damage[side] / np.maximum(self.duration, 1)
+
+    def time_to_kill(self, side):
+        """Duration of the fights won by `side`."""
+        return self.duration[self.winner == side]
+
+    def summary(self, confidence=0.95):
+        """
+        Summary statistics of both sides.
+
+        Args:
+            confidence (float, optional): Confidence level of the intervals.
+
+        Returns:
+            tuple: Statistics of each side, with the combatant's name, the mean and confidence interval
+                of damage per second, the win rate and hit rate over all fights with their
+                binomial confidence intervals, and the 5th, 50th and 95th percentiles of
+                the time to kill.
+        """
+        fights = len(self.winner)
+        summary = []
+        for side, combatant in enumerate(self.combatants):
+            wins = int(np.count_nonzero(self.winner == side))
+            attacks = int(self.attacks[side].sum())
+            hits = int(self.hits[side].sum())
+            time_to_kill = self.time_to_kill(side)
+
+            summary.append({
+                "name": combatant.name,
+                "win_rate": wins / fights,
+                "win_rate_ci": _proportion_interval(wins, fights, confidence),
+                "hit_rate": hits / attacks if attacks else 0.0,
+                "hit_rate_ci": _proportion_interval(hits, attacks, confidence),
+                "dps": float(self.dps(side).mean()),
+                "dps_ci": _mean_interval(self.dps(side), confidence),
+                "time_to_kill": (
+                    tuple(np.percentile(time_to_kill, (5, 50, 95)).tolist()) if len(time_to_kill) else None
+                ),
+            })
+
+        return tuple(summary)
+
+
+def _proportion_interval(successes, trials, confidence):
+    if not trials:
+        return (0.0, 1.0)
+    interval = stats.binomtest(successes, trials).proportion_ci(confidence_level=confidence)
+    return (float(interval.low), float(interval.high))
+
+
+def _mean_interval(values, confidence):
+    if len(values) < 2 or not values.std():
+        mean = float(values.mean()) if len(values) else float("nan")
+        return (mean, mean)
+    low, high = stats.t.interval(confidence, len(values) - 1, loc=values.mean(), scale=stats.sem(values))
+    return (float(low), float(high))
+
+
+def simulate_duel(first, second, fights=100_000, max_time=600, seed=None):
+    """
+    Simulate melee duels between two combatants, all fights advancing together.
+
+    Args:
+        first (Combatant): The combatant attacking first.
+        second (Combatant): Its opponent.
+        fights (int, optional): Amount of duels.
+        max_time (int, optional): Seconds after which a fight counts as a draw.
+        seed (int, optional): Seed for repeatable results.
+
+    Returns:
+        DuelResult: The outcome of every fight.
+    """
+    rng = np.random.default_rng(seed)
+    sides = (first, second)
+
+    hp = np.array([[first.hp], [second.hp]], dtype=np.int64).repeat(fights, axis=1)
+    stamina = np.array([[first.stamina], [second.stamina]], dtype=np.int64).repeat(fights, axis=1)
+    stamina_max = np.array([[first.stamina], [second.stamina]], dtype=np.int64)
+    strength = np.array([[first.strength], [second.strength]], dtype=np.int64)
+
+    next_attack = np.zeros((2, fights))
+    # the recovery script is already running when the fight starts
+    next_recovery = rng.uniform(0, RECOVERY_INTERVAL, fights)
+
+    damage = np.zeros((2, fights), dtype=np.int64)
+    attacks = np.zeros((2, fights), dtype=np.int64)
+    hits = np.zeros((2, fights), dtype=np.int64)
+    blocks = np.zeros((2, fights), dtype=np.int64)
+    winner = np.full(fights, -1, dtype=np.int8)
+    duration = np.full(fights, float(max_time))
+    active = np.ones(fights, dtype=bool)
+
+    def attack(side, fight):
+        attacker, target = sides[side], sides[1 - side]
+        other = 1 - side
+
+        # too exhausted to attack, wait for the next recovery
+        cost = attacker.attack_stamina_cost
+        exhausted = cost >= stamina[side, fight]
+        next_attack[side, fight[exhausted]] = next_recovery[fight[exhausted]]
+        fight = fight[~exhausted]
+
+        now = next_attack[side, fight]
+        stamina[side, fight] -= cost
+        attacks[side, fight] += 1
+        next_attack[side, fight] = now + attacker.cooldown
+
+        if target.shield or target.can_parry:
+            blocked = DEFENSE_STAMINA_COST < stamina[other, fight]
+            stamina[other, fight[blocked]] -= DEFENSE_STAMINA_COST
+            blocks[other, fight[blocked]] += 1
+            # fights are in melee range, blocking delays the attacker
+            next_attack[side, fight[blocked]] += 1
+            fight, now = fight[~blocked], now[~blocked]
+
+        attack_roll = rng.integers(1, 6, (2, len(fight))).sum(axis=0) + attacker.strength + attacker.attack_modifier
+        defense_roll = rng.integers(1, 6, (2, len(fight))).sum(axis=0) + target.cunning - target.attack_modifier
+        hit = attack_roll >= defense_roll
+        fight, now = fight[hit], now[hit]
+        hits[side, fight] += 1
+
+        dealt = rng.integers(attacker.min_damage, attacker.max_damage, len(fight)) + attacker.strength
+        if attacker.aggro == "defensive":
+            dealt = np.trunc(dealt / 2).astype(np.int64)
+        elif attacker.aggro == "aggressive":
+            dealt = np.trunc(dealt * 1.5).astype(np.int64)
+
+        if target.armor:
+            dealt -= target.armor
+            pierced = dealt > 0
+            fight, now, dealt = fight[pierced], now[pierced], dealt[pierced]
+
+        hp[other, fight] -= dealt
+        damage[side, fight] += dealt
+
+        killed = hp[other, fight] <= 0
+        winner[fight[killed]] = side
+        duration[fight[killed]] = now[killed]
+        active[fight[killed]] = False
+
+    while True:
+        fight = np.flatnonzero(active)
+        if not len(fight):
+            break
+
+        next_turn = next_attack[:, fight].min(axis=0)
+        recovering = next_recovery[fight] <= next_turn
+        over = np.where(recovering, next_recovery[fight], next_turn) > max_time
+        active[fight[over]] = False
+        fight, recovering = fight[~over], recovering[~over]
+
+        recovered = fight[recovering]
+        stamina[:, recovered] = np.minimum(stamina[:, recovered] + strength, stamina_max)
+        next_recovery[recovered] += RECOVERY_INTERVAL
+
+        fight = fight[~recovering]
+        first_turn = next_attack[0, fight] <= next_attack[1, fight]
+        attack(0, fight[first_turn])
+        attack(1, fight[~first_turn])
+
+    return DuelResult(
+        combatants=sides,
+        winner=winner,
+        duration=duration,
+        damage=damage,
+        attacks=attacks,
+        hits=hits,
+        blocks=blocks,
+    )
@@ -0,0 +1,520 @@
+"""
+Headless combat
+
+Runs `CombatHandler` against plain stand-in fighters, without database, typeclasses or
+sessions, so combat can be exercised and measured on its own. Room messages go to a
+`NullLocation` which only counts them.
+
+The benchmark can be run from the game directory:
+
+    python -m world.combat_headless --attacks 20000 --seed 1 --merge-fighters 500 --pack 10
+
+and a combat log exported with `CombatEventLog.export` replayed with:
+
+    python -m world.combat_headless --replay fight.clog
+
+"""
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from itertools import count, cycle
+
+from .buffs import AbstractBuffHandler
+from .combat import CombatHandler, CombatScheduler
+from .combat_log import CombatEventLog
+from .enums import AttackType, CombatEvent, CombatRange
+from .rng import RandomStream, seed_streams
+
+
+class NullLocation:
+    """
+    Message sink standing in for a room, it drops every message and only counts them.
+    """
+    __slots__ = ("messages",)
+
+    allow_pvp = True
+
+    def __init__(self):
+        self.messages = 0
+
+    def msg_contents(self, text=None, **kwargs):
+        self.messages += 1
+
+
+class HeadlessCooldowns:
+    """
+    The parts of evennia's CooldownHandler used by combat, kept in a plain dict.
+    """
+    __slots__ = ("data", "clock")
+
+    def __init__(self, clock=time.monotonic):
+        self.data = {}
+        self.clock = clock
+
+    def add(self, cooldown, seconds):
+        self.data[cooldown] = self.clock() + seconds
+
+    def ready(self, *args):
+        now = self.clock()
+        return all(self.data.get(cooldown, 0) <= now for cooldown in args)
+
+    def time_left(self, *args, use_int=False):
+        now = self.clock()
+        left = max((self.data.get(cooldown, 0) - now for cooldown in args), default=0)
+        left = max(0, left)
+        return int(left) if use_int else left
+
+    def clear(self):
+        self.data.clear()
+
+
+class HeadlessItem:
+    """
+    A shield or any other item which only needs to be displayed.
+    """
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __str__(self):
+        return self.key
+
+
+class HeadlessWeapon(HeadlessItem):
+    """
+    Stand-in for a WeaponObject, with the same combat values and defaults.
+    """
+    __slots__ = (
+        "attack_range", "attack_type", "min_damage", "max_damage",
+        "stamina_cost", "cooldown", "parry", "is_throwable",
+    )
+
+    def __init__(
+        self,
+        key="weapon",
+        attack_range=CombatRange.MELEE,
+        attack_type=AttackType.MELEE,
+        min_damage=1,
+        max_damage=4,
+        stamina_cost=2,
+        cooldown=2,
+        parry=False,
+        is_throwable=None,
+    ):
+        super().__init__(key)
+        self.attack_range = attack_range
+        self.attack_type = attack_type
+        self.min_damage = min_damage
+        self.max_damage = max_damage
+        self.stamina_cost = stamina_cost
+        self.cooldown = cooldown
+        self.parry = parry
+        self.is_throwable = is_throwable
+
+    def can_parry(self):
+        return self.parry
+
+
+class _HeadlessAttributes:
+    """
+    Answers `fighter.attributes.get(stat)` from the fighter's own values.
+    """
+    __slots__ = ("fighter",)
+
+    def __init__(self, fighter):
+        self.fighter = fighter
+
+    def get(self, key, default=None):
+        return getattr(self.fighter, key, default)
+
+
+_fighter_ids = count(1)
+
+
+class HeadlessFighter:
+    """
+    Stand-in for a BaseCharacter, with the same values and defaults that combat reads.
+    """
+    __slots__ = (
+        "key", "hp", "hp_max", "stamina", "stamina_max", "strength", "cunning", "will",
+        "aggro", "weapon", "shield", "armor", "is_pc", "_combat", "location",
+        "attributes", "cooldowns", "buffs", "ai_combat_policy", "id",
+    )
+
+    def __init__(
+        self,
+        key="fighter",
+        location=None,
+        hp=1,
+        stamina=1,
+        strength=1,
+        cunning=1,
+        will=1,
+        aggro="n",
+        weapon=None,
+        shield=None,
+        armor=0,
+        is_pc=False,
+        ai_combat_policy="aggressive",
+        clock=time.monotonic,
+        fighter_id=None,
+    ):
+        # unique like the database id of a character
+        self.id = fighter_id if fighter_id is not None else next(_fighter_ids)
+        self.key = key
+        self.location = location if location is not None else NullLocation()
+        self.hp = self.hp_max = hp
+        self.stamina = self.stamina_max = stamina
+        self.strength = strength
+        self.cunning = cunning
+        self.will = will
+        self.aggro = aggro
+        self.weapon = weapon
+        self.shield = shield
+        self.armor = armor
+        self.is_pc = is_pc
+        self.ai_combat_policy = ai_combat_policy
+        self._combat = None
+        self.attributes = _HeadlessAttributes(self)
+        self.cooldowns = HeadlessCooldowns(clock)
+        self.buffs = AbstractBuffHandler()
+
+    def __repr__(self):
+        return f"<HeadlessFighter {self.key}>"
+
+    def __str__(self):
+        return self.key
+
+    @property
+    def combat(self):
+        combat = self._combat
+        if combat is not None and combat.parent is not None:
+            combat = self._combat = combat.find()
+
+        return combat
+
+    @combat.setter
+    def combat(self, value):
+        self._combat = value
+
+    def get_display_name(self, looker=None, **kwargs):
+        return self.key
+
+    def msg(self, text=None, **kwargs):
+        pass
+
+    def at_damage(self, damage, attacker=None):
+        self.hp -= damage
+        if self.hp <= 0:
+            self.at_defeat()
+
+    def spend_stamina(self, amount):
+        self.stamina -= amount
+
+    def at_defeat(self):
+        if self.combat:
+            self.combat.remove(self)
+
+        self.location.msg_contents("$You() $conj(die).", from_obj=self)
+
+
+class HeadlessCombatHandler(CombatHandler):
+    """
+    CombatHandler with its own scheduler, which only ticks when told to.
+    """
+    __slots__ = ()
+
+    scheduler = CombatScheduler(autostart=False)
+
+
+_ATTACKS = {
+    AttackType.MELEE: (CombatHandler.at_melee_attack, CombatRange.MELEE),
+    AttackType.RANGED: (CombatHandler.at_ranged_attack, CombatRange.RANGED),
+    AttackType.THROWN: (CombatHandler.at_thrown_attack, CombatRange.SHORT),
+}
+
+
+def create_headless_combat(
+    fighters=2, attack_type=AttackType.MELEE, shields=True, hp=10**9, stamina=10**9, block_size=0
+):
+    """
+    Create a combat between headless fighters sharing a NullLocation.
+
+    Args:
+        fighters (int, optional): Amount of fighters, at least 2.
+        attack_type (AttackType, optional): The kind of weapon every fighter wields.
+        shields (bool, optional): Give a shield to every other fighter, so blocks are part of the mix.
+        hp (int, optional): Starting health, high by default so nobody dies during a benchmark.
+        stamina (int, optional): Starting stamina.
+        block_size (int, optional): Draw the random numbers of the fight by blocks of this size.
+
+    Returns:
+        tuple: The HeadlessCombatHandler and the list of fighters.
+    """
+    location = NullLocation()
+    attack_range = _ATTACKS[attack_type][1]
+    shield = HeadlessItem("shield")
+
+    roster = [
+        HeadlessFighter(
+            key=f"fighter{index}",
+            location=location,
+            hp=hp,
+            stamina=stamina,
+            weapon=HeadlessWeapon(attack_range=attack_range, attack_type=attack_type),
+            shield=shield if shields and index % 2 else None,
+            armor=index % 3,
+        )
+        for index in range(fighters)
+    ]
+
+    combat = HeadlessCombatHandler(roster[0], roster[1], rng=RandomStream(block_size=block_size))
+    for fighter in roster[2:]:
+        combat.add(fighter)
+
+    return combat, roster
+
+
+def _run_attacks(combat, roster, attack, attacks):
+    pairs = cycle([(attacker, target) for attacker in roster for target in roster if attacker is not target])
+    for _ in range(attacks):
+        attacker, target = next(pairs)
+        attack(combat, attacker, target)
+
+
+def benchmark_attacks(
+    attack_type=AttackType.MELEE, attacks=10000, fighters=2, seed=None, shields=True, block_size=0
+):
+    """
+    Resolve attacks between headless fighters and measure how fast they go.
+
+    Timing and memory are measured in separate runs, tracemalloc slows everything down.
+
+    Args:
+        attack_type (AttackType, optional): MELEE, RANGED or THROWN.
+        attacks (int, optional): Amount of attacks to resolve in each run.
+        fighters (int, optional): Amount of fighters in the combat.
+        seed (int, optional): Seed for the random streams of the fights, for repeatable runs.
+        shields (bool, optional): Give a shield to every other fighter.
+        block_size (int, optional): Draw random numbers by blocks of this size.
+
+    Returns:
+        dict: `attacks_per_second`, `blocks_per_attack` (memory blocks still allocated
+            after the run, per attack), `peak_bytes_per_attack` (tracemalloc peak
+            during the run, per attack) and `messages` sent to the room.
+    """
+    attack = _ATTACKS[attack_type][0]
+
+    if seed is not None:
+        seed_streams(seed)
+    combat, roster = create_headless_combat(fighters, attack_type, shields, block_size=block_size)
+    start = time.perf_counter()
+    _run_attacks(combat, roster, attack, attacks)
+    elapsed = time.perf_counter() - start
+    messages = roster[0].location.messages
+
+    if seed is not None:
+        seed_streams(seed)
+    combat, roster = create_headless_combat(fighters, attack_type, shields, block_size=block_size)
+    tracemalloc.start()
+    try:
+        blocks = sys.getallocatedblocks()
+        _run_attacks(combat, roster, attack, attacks)
+        blocks = sys.getallocatedblocks() - blocks
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "attacks_per_second": attacks / elapsed if elapsed else float("inf"),
+        "blocks_per_attack": blocks / attacks,
+        "peak_bytes_per_attack": peak / attacks,
+        "messages": messages,
+    }
+
+
+def benchmark_merges(fighters=500, seed=None):
+    """
+    Start a skirmish between every two fighters, then chain the skirmishes together in
+    random order with `CombatHandler.get_or_create` until everybody is in a single fight,
+    like a riot spreading through a town.
+
+    Args:
+        fighters (int, optional): Amount of fighters, rounded down to an even number.
+        seed (int, optional): Seed for the order of the merges.
+
+    Returns:
+        dict: `seconds` spent merging and `merges_per_second`.
+    """
+    rng = random.Random(seed)
+    location = NullLocation()
+    roster = [HeadlessFighter(key=f"fighter{index}", location=location) for index in range(fighters // 2 * 2)]
+    pairs = [(roster[index], roster[index + 1]) for index in range(0, len(roster), 2)]
+    for first, second in pairs:
+        HeadlessCombatHandler(first, second)
+
+    links = [(pairs[index][1], pairs[index + 1][0]) for index in range(len(pairs) - 1)]
+    rng.shuffle(links)
+
+    start = time.perf_counter()
+    for attacker, target in links:
+        HeadlessCombatHandler.get_or_create(attacker, target)
+    elapsed = time.perf_counter() - start
+
+    combat = roster[0].combat
+    assert len(combat.positions) == len(roster), "Fighters were lost while merging."
+    assert all(fighter.combat is combat for fighter in roster), "Fighters are not in the same fight."
+
+    return {
+        "seconds": elapsed,
+        "merges_per_second": len(links) / elapsed if elapsed else float("inf"),
+    }
+
+
+def benchmark_planning(npcs=10, plans=1000, seed=None):
+    """
+    Plan the actions of a pack of NPCs fighting a single player, as the scheduler does
+    on every tick, and measure how fast it goes.
+
+    Args:
+        npcs (int, optional): Size of the pack.
+        plans (int, optional): Amount of times the whole pack is planned for.
+        seed (int, optional): Seed for the random streams of the fight.
+
+    Returns:
+        dict: `plans_per_second` and `microseconds_per_npc` for one plan.
+    """
+    if seed is not None:
+        seed_streams(seed)
+    combat, roster = create_headless_combat(npcs + 1)
+    roster[0].is_pc = True
+
+    start = time.perf_counter()
+    for _ in range(plans):
+        combat.plan_actions()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "plans_per_second": plans / elapsed if elapsed else float("inf"),
+        "microseconds_per_npc": elapsed / plans / npcs * 10**6,
+    }
+
+
+def replay(log, until=None):
+    """
+    Replay a combat log through a headless fight, to look at the state of the fight after
+    its last event or at a given time.
+
+    Fighters which joined before the oldest event kept in the log start with 0 health,
+    theirs ends up as minus the damage they took.
+
+    Args:
+        log (CombatEventLog): The log, of a live fight or loaded from a file.
+        until (float, optional): Stop after the events of this many seconds into the log.
+
+    Returns:
+        tuple: The HeadlessCombatHandler, None if less than two fighters showed up, and
+            a dict of the HeadlessFighters by the id they had in the fight.
+    """
+    location = NullLocation()
+    fighters = {
+        fighter_id: HeadlessFighter(key=name, location=location, hp=0, fighter_id=fighter_id)
+        for fighter_id, name in log.names.items()
+    }
+    combat = None
+    waiting = None
+
+    def join(fighter):
+        nonlocal combat, waiting
+        if combat is None:
+            if waiting is None or waiting is fighter:
+                waiting = fighter
+                return
+            combat = HeadlessCombatHandler(waiting, fighter)
+        elif fighter not in combat.positions:
+            combat.add(fighter)
+
+    for event_time, kind, actor, target, value in log:
+        if until is not None and event_time > until:
+            break
+
+        fighter = fighters[actor]
+        if kind in (CombatEvent.LEAVE, CombatEvent.DEFEAT):
+            if combat is not None and fighter in combat.positions:
+                if kind == CombatEvent.LEAVE:
+                    combat.remove(fighter)
+                else:
+                    fighter.at_defeat()
+            continue
+
+        if kind == CombatEvent.JOIN:
+            fighter.hp = fighter.hp_max = value
+
+        join(fighter)
+        if target is not None:
+            join(fighters[target])
+        if combat is None:
+            continue
+
+        if kind == CombatEvent.MOVE:
+            combat.positions[fighter] = value
+        elif kind == CombatEvent.HIT:
+            fighters[target].hp -= value
+
+    return combat, fighters
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark headless combat attacks.")
+    parser.add_argument("--attacks", type=int, default=10000)
+    parser.add_argument("--fighters", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--no-shields", dest="shields", action="store_false")
+    parser.add_argument("--block-size", type=int, default=0)
+    parser.add_argument("--merge-fighters", type=int, default=500)
+    parser.add_argument("--pack", type=int, default=10)
+    parser.add_argument("--replay", metavar="PATH", help="Replay an exported combat log instead.")
+    options = parser.parse_args(args)
+
+    if options.replay:
+        log = CombatEventLog.load(options.replay)
+        labels = {fighter_id: f"{name}(#{fighter_id})" for fighter_id, name in log.names.items()}
+        for event_time, kind, actor, target, value in log:
+            target = labels[target] if target is not None else ""
+            print(f"{event_time:>9.2f} {kind.name.lower():<7} {labels[actor]:<20} {target:<20} {value}")
+
+        _, fighters = replay(log)
+        print(f"{len(log)} events, {log.dropped} dropped")
+        for fighter_id, fighter in fighters.items():
+            print(f"{labels[fighter_id]:<20} hp {fighter.hp}")
+        return
+
+    print(f"{'attack':<8} {'attacks/s':>12} {'blocks/attack':>14} {'peak B/attack':>14}")
+    for attack_type in _ATTACKS:
+        result = benchmark_attacks(
+            attack_type, options.attacks, options.fighters, options.seed, options.shields, options.block_size
+        )
+        print(
+            f"{attack_type.name.lower():<8} {result['attacks_per_second']:>12,.0f} "
+            f"{result['blocks_per_attack']:>14.3f} {result['peak_bytes_per_attack']:>14.2f}"
+        )
+
+    result = benchmark_merges(options.merge_fighters, options.seed)
+    print(
+        f"{options.merge_fighters} fighters merged into one fight in {result['seconds'] * 1000:.2f}ms "
+        f"({result['merges_per_second']:,.0f} merges/s)"
+    )
+
+    result = benchmark_planning(options.pack, seed=options.seed)
+    print(
+        f"pack of {options.pack} NPCs planned {result['plans_per_second']:,.0f} times/s "
+        f"({result['microseconds_per_npc']:.1f}us per NPC)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Combat event log
+
+Every CombatHandler records what happens in its fight in a `CombatEventLog`: fighters
+joining and leaving, attacks, hits, blocks, dodges, movement and defeats. Events are
+packed in preallocated arrays used as a ring buffer, so recording one costs a few
+array writes and the oldest events are overwritten once the log is full.
+
+A log can be exported to a binary file, loaded back and replayed through the headless
+combat engine with `world.combat_headless.replay`, to look into a fight after the fact.
+
+"""
+
+import struct
+import sys
+import time
+from array import array
+
+from .enums import CombatEvent
+
+# events kept by each fight before the oldest ones are overwritten
+COMBAT_LOG_SIZE = 1024
+
+_MAGIC = b"ACLG"
+_VERSION = 2
+# magic, version, fighters, events, events dropped
+_HEADER = struct.Struct("<4sHHII")
+# id of a fighter and length of its name
+_FIGHTER = struct.Struct("<QH")
+# marks an event without a target
+_NO_FIGHTER = 0xFFFF
+
+# array typecode of each column, in file order
+_COLUMNS = (("_time", "d"), ("_kind", "B"), ("_actor", "H"), ("_target", "H"), ("_value", "i"))
+
+
+class CombatEventLog:
+    """
+    Fixed-size log of the events of a fight.
+
+    Events are `(time, kind, actor, target, value)` tuples, time in seconds since the log
+    was created, kind a CombatEvent, actor and target the ids of the fighters (target
+    None if the event has none) and value depending on the kind:
+
+    - JOIN: health of the fighter when it joined
+    - ATTACK: AttackType of the attack
+    - HIT: damage dealt
+    - MOVE: new position of the fighter
+    - 0 for the others
+
+    Fighters are told apart by their `id`, their names are only kept as labels in `names`,
+    so two fighters with the same name stay two fighters.
+    """
+    __slots__ = ("size", "count", "fighters", "names", "clock", "_start", "_ids") + tuple(name for name, _ in _COLUMNS)
+
+    def __init__(self, size: int = COMBAT_LOG_SIZE, clock=time.monotonic):
+        """
+        Args:
+            size (int, optional): Amount of events kept.
+            clock (callable, optional): Returns the current time in seconds.
+        """
+        self.size = size
+        # events recorded since the start, including the overwritten ones
+        self.count = 0
+        # ids of the fighters, their index is what the events store
+        self.fighters: list[int] = []
+        # fighter id: name, as it was when it first showed up
+        self.names: dict[int, str] = {}
+        self.clock = clock
+        self._start = clock()
+        # fighter id: index in fighters
+        self._ids: dict[int, int] = {}
+        for name, typecode in _COLUMNS:
+            setattr(self, name, array(typecode, bytes(array(typecode).itemsize * size)))
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    @property
+    def dropped(self) -> int:
+        """
+        Amount of events overwritten by newer ones.
+        """
+        return max(0, self.count - self.size)
+
+    def _fighter_index(self, fighter) -> int:
+        index = self._ids.get(fighter.id)
+        if index is None:
+            index = self._ids[fighter.id] = len(self.fighters)
+            self.fighters.append(fighter.id)
+            self.names[fighter.id] = fighter.key
+
+        return index
+
+    def record(self, kind: CombatEvent, actor, target=None, value: int = 0) -> None:
+        """
+        Record an event, overwriting the oldest one if the log is full.
+        """
+        index = self.count % self.size
+        ids = self._ids
+        actor_id = ids.get(actor.id)
+        if actor_id is None:
+            actor_id = self._fighter_index(actor)
+        if target is None:
+            target_id = _NO_FIGHTER
+        elif (target_id := ids.get(target.id)) is None:
+            target_id = self._fighter_index(target)
+
+        self._time[index] = self.clock() - self._start
+        self._kind[index] = kind
+        self._actor[index] = actor_id
+        self._target[index] = target_id
+        self._value[index] = value
+        self.count += 1
+
+    def _ordered(self, column: array) -> array:
+        """
+        A column of the log, from the oldest event to the newest.
+        """
+        if self.count <= self.size:
+            return column[:self.count]
+
+        start = self.count % self.size
+        return column[start:] + column[:start]
+
+    def __iter__(self):
+        fighters = self.fighters
+        columns = [self._ordered(getattr(self, name)) for name, _ in _COLUMNS]
+        for event_time, kind, actor, target, value in zip(*columns):
+            yield (
+                event_time,
+                CombatEvent(kind),
+                fighters[actor],
+                None if target == _NO_FIGHTER else fighters[target],
+                value,
+            )
+
+    def export(self, path: str) -> None:
+        """
+        Write the log to a binary file, from the oldest event to the newest. Columns are
+        written one after the other, little-endian.
+        """
+        with open(path, "wb") as file:
+            file.write(_HEADER.pack(_MAGIC, _VERSION, len(self.fighters), len(self), self.dropped))
+            for fighter_id in self.fighters:
+                name = self.names[fighter_id].encode("utf-8")
+                file.write(_FIGHTER.pack(fighter_id, len(name)))
+                file.write(name)
+
+            for name, _ in _COLUMNS:
+                column = self._ordered(getattr(self, name))
+                if sys.byteorder == "big":
+                    column.byteswap()
+                file.write(column.tobytes())
+
+    @classmethod
+    def load(cls, path: str) -> 'CombatEventLog':
+        """
+        Read a log written by `export`. It is exactly as large as the events it holds.
+        """
+        with open(path, "rb") as file:
+            magic, version, fighters, events, dropped = _HEADER.unpack(file.read(_HEADER.size))
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f"{path} is not a combat log this version can read.")
+
+            log = cls(size=events)
+            for index in range(fighters):
+                fighter_id, length = _FIGHTER.unpack(file.read(_FIGHTER.size))
+                log.fighters.append(fighter_id)
+                log.names[fighter_id] = file.read(length).decode("utf-8")
+                log._ids[fighter_id] = index
+
+            for name, typecode in _COLUMNS:
+                column = array(typecode)
+                column.frombytes(file.read(column.itemsize * events))
+                if sys.byteorder == "big":
+                    column.byteswap()
+                setattr(log, name, column)
+
+        log.count = events + dropped
+        if dropped and events:
+            # the oldest event sits at count % size, put it back there
+            start = log.count % events
+            for name, _ in _COLUMNS:
+                column = getattr(log, name)
+                setattr(log, name, column[events - start:] + column[:events - start])
+
+        return log
@@ -0,0 +1,272 @@
+"""
+Dice expressions and random tables
+
+Dice strings like "1d20", "2d6+3" or "4d6kh3" are parsed once into a `DiceExpression`,
+cached by `parse_dice`, so rolling the same string again only rolls the dice. See
+`DiceRollEngine.roll` and `DiceRollEngine.roll_many`.
+
+Syntax: `<number>d<dicesize>`, then optionally `kh<number>` or `kl<number>` to keep only
+the highest or lowest dice, then optionally `+<number>` or `-<number>`.
+
+Random tables from `world.random_tables` are compiled by `compile_table` into a
+`CompiledTable`, which gives the result of a roll with a single index. Tables of weighted
+choices can be sampled with an `AliasSampler` in constant time, however large they are.
+
+"""
+
+import re
+from functools import lru_cache
+from itertools import repeat
+
+import numpy as np
+
+MAX_DIE_SIZE = 1000
+
+_DICE_RE = re.compile(r"(\d+)d(\d+)(?:k([hl])(\d+))?(?:([+-])(\d+))?")
+
+
+class DiceExpression:
+    """
+    A parsed dice string, ready to be rolled.
+    """
+    __slots__ = ("number", "size", "keep", "modifier")
+
+    def __init__(self, number: int, size: int, keep: int = 0, modifier: int = 0):
+        """
+        Args:
+            number (int): Amount of dice.
+            size (int): Sides of each die.
+            keep (int, optional): Only add up this many of the highest dice if positive,
+                of the lowest if negative, all of them if 0.
+            modifier (int, optional): Added to the sum of the dice.
+        """
+        self.number = number
+        self.size = size
+        self.keep = keep
+        self.modifier = modifier
+
+    def __repr__(self):
+        text = f"{self.number}d{self.size}"
+        if self.keep:
+            text += f"kh{self.keep}" if self.keep > 0 else f"kl{-self.keep}"
+        if self.modifier:
+            text += f"{self.modifier:+d}"
+        return f"<DiceExpression {text}>"
+
+    @property
+    def minimum(self) -> int:
+        return (abs(self.keep) or self.number) + self.modifier
+
+    @property
+    def maximum(self) -> int:
+        return (abs(self.keep) or self.number) * self.size + self.modifier
+
+    def roll(self, randint) -> int:
+        """
+        Roll the dice.
+
+        Args:
+            randint (callable): `randint(a, b)` returning an integer in [a, b].
+        """
+        number, size = self.number, self.size
+        if number == 1:
+            return randint(1, size) + self.modifier
+
+        dice = map(randint, repeat(1, number), repeat(size, number))
+        if not self.keep:
+            return sum(dice) + self.modifier
+
+        dice = sorted(dice, reverse=self.keep > 0)
+        return sum(dice[:abs(self.keep)]) + self.modifier
+
+    def roll_many(self, generator: np.random.Generator, amount: int) -> np.ndarray:
+        """
+        Roll the dice `amount` times at once.
+
+        Args:
+            generator (numpy.random.Generator): Generator to draw the dice from.
+            amount (int): Amount of rolls.
+
+        Returns:
+            numpy.ndarray: The results, one per roll.
+        """
+        dice = generator.integers(1, self.size, size=(amount, self.number), endpoint=True)
+        if self.keep:
+            dice.sort(axis=1)
+            dice = dice[:, -self.keep:] if self.keep > 0 else dice[:, :-self.keep]
+
+        return dice.sum(axis=1) + self.modifier
+
+
+@lru_cache(maxsize=256)
+def parse_dice(roll_string: str) -> DiceExpression:
+    """
+    Parse a dice string, see the syntax above. Results are cached by string.
+
+    Raises:
+        TypeError: If the string is not a valid dice roll.
+    """
+    text = roll_string.lower().replace(" ", "")
+    if "d" not in text:
+        raise TypeError(
+            f"Dice roll '{roll_string}' was not recognized. Must be `<number>d<dicesize>`."
+        )
+
+    match = _DICE_RE.fullmatch(text)
+    if not match:
+        raise TypeError(f"The number and dice-size of '{roll_string}' must be numerical.")
+
+    number, size, keep_side, keep, sign, modifier = match.groups()
+    number = int(number)
+    size = int(size)
+    if not 0 < size <= MAX_DIE_SIZE:
+        raise TypeError(f"Invalid die-size used (must be between 1 and {MAX_DIE_SIZE} sides)")
+    if number < 1:
+        raise TypeError(f"Invalid number of dice rolled in '{roll_string}' (must be at least 1)")
+
+    keep = int(keep) if keep_side else 0
+    if keep_side and not 0 < keep <= number:
+        raise TypeError(f"Can't keep {keep} dice out of {number} in '{roll_string}'.")
+    if keep_side == "l":
+        keep = -keep
+
+    modifier = int(modifier) if modifier else 0
+    if sign == "-":
+        modifier = -modifier
+
+    return DiceExpression(number, size, keep, modifier)
+
+
+class CompiledTable:
+    """
+    A random table with a result stored for every roll from its lowest to its highest,
+    so looking up a roll is a single index.
+
+    Tables are either lists with one element per roll, starting at 1, or lists of
+    `("X-Y", result)` tuples. Rolls outside of the table give its first or last result,
+    as do rolls falling in gaps of a tuple table.
+    """
+    __slots__ = ("lookup", "offset", "below", "above")
+
+    def __init__(self, table):
+        if isinstance(table[0], (tuple, list)):
+            ranges = []
+            for valrange, choice in table:
+                minval, *maxval = valrange.split("-", 1)
+                minval = abs(int(minval))
+                maxval = abs(int(maxval[0]) if maxval else minval)
+                ranges.append((minval, maxval, choice))
+
+            self.offset = min(minval for minval, _, _ in ranges)
+            highest = max(maxval for _, maxval, _ in ranges)
+            first = table[0][1]
+            lookup = [first] * (highest - self.offset + 1)
+            # the first range matching a roll wins
+            for minval, maxval, choice in reversed(ranges):
+                lookup[minval - self.offset:maxval - self.offset + 1] = [choice] * (maxval - minval + 1)
+
+            self.lookup = tuple(lookup)
+            self.below = first
+            self.above = table[-1][1]
+        else:
+            self.lookup = tuple(table)
+            self.offset = 1
+            self.below = table[0]
+            self.above = table[-1]
+
+    def __len__(self):
+        return len(self.lookup)
+
+    def __getitem__(self, roll: int):
+        """
+        The result of the table for a roll.
+        """
+        index = roll - self.offset
+        if index < 0:
+            return self.below
+        if index >= len(self.lookup):
+            return self.above
+        return self.lookup[index]
+
+
+# id of the table: (table, compiled table), the table is kept so its id stays unique
+_compiled_tables: dict[int, tuple[list, CompiledTable]] = {}
+
+
+def compile_table(table) -> CompiledTable:
+    """
+    Get the compiled version of a random table, compiling it the first time. Tables are
+    cached by identity, so they must not be changed once they were rolled on.
+    """
+    cached = _compiled_tables.get(id(table))
+    if cached is not None and cached[0] is table:
+        return cached[1]
+
+    compiled = CompiledTable(table)
+    _compiled_tables[id(table)] = (table, compiled)
+    return compiled
+
+
+class AliasSampler:
+    """
+    Picks from weighted choices with the alias method, in constant time whatever the
+    amount of choices, after a setup linear in their amount.
+    """
+    __slots__ = ("choices", "probability", "alias")
+
+    def __init__(self, choices, weights):
+        """
+        Args:
+            choices (sequence): The choices.
+            weights (sequence): Weight of each choice, not necessarily summing to 1.
+
+        Raises:
+            ValueError: If there are no choices, or their weights don't add up to more than 0.
+        """
+        amount = len(choices)
+        total = sum(weights)
+        if not amount or len(weights) != amount or total <= 0:
+            raise ValueError("The sampler needs as many positive weights as choices.")
+
+        self.choices = tuple(choices)
+        scaled = [weight * amount / total for weight in weights]
+        self.probability = [1.0] * amount
+        self.alias = list(range(amount))
+
+        small = [index for index, weight in enumerate(scaled) if weight < 1]
+        large = [index for index, weight in enumerate(scaled) if weight >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            # the large choice fills the rest of the small one's column
+            scaled[more] -= 1 - scaled[less]
+            (small if scaled[more] < 1 else large).append(more)
+
+    def sample(self, random):
+        """
+        Pick a choice.
+
+        Args:
+            random (callable): Returns a float in [0.0, 1.0).
+        """
+        column = random() * len(self.choices)
+        index = int(column)
+        if column - index >= self.probability[index]:
+            index = self.alias[index]
+        return self.choices[index]
+
+    def sample_many(self, generator: np.random.Generator, amount: int) -> list:
+        """
+        Pick `amount` choices at once.
+
+        Args:
+            generator (numpy.random.Generator): Generator to draw from.
+            amount (int): Amount of choices to pick.
+        """
+        columns = generator.random(amount) * len(self.choices)
+        indexes = columns.astype(np.intp)
+        use_alias = (columns - indexes) >= np.take(self.probability, indexes)
+        indexes = np.where(use_alias, np.take(self.alias, indexes), indexes)
+        choices = self.choices
+        return [choices[index] for index in indexes]
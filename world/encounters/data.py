@@ -3,6 +3,8 @@ import random
 from evennia.prototypes.spawner import spawn
 
 ENCOUNTERS = {}
+# Given to every mob spawned by an encounter, so leftovers can be swept
+ENCOUNTER_MOB_TAG = ("encounter_mob", "mob_source")
 
 
 class EncounterEntry:
@@ -33,21 +35,40 @@ class EncounterType:
         self.entries = entries
         ENCOUNTERS[key] = self
 
-    def spawn(self, location, players):
+    def spawn(self, location, players, virtual=False):
+        """
+        Spawn the encounter's mobs, scaled to the highest level among the players.
+
+        Args:
+            location (Room): Where to spawn the mobs.
+            players (list): The characters running into the encounter.
+            virtual (bool, optional): Only place VirtualMobs in the location, they will
+                be created once someone engages them.
+
+        Returns:
+            list: The spawned mobs, or the VirtualMobs.
+        """
+        # Avoids circular imports between the typeclasses and the encounters
+        from typeclasses.mobs.mob import BaseMob
+
         player_count = len(players)
         highest_level = max((player.levels.level for player in players))
 
-        group = []
+        prototype_amounts = []
         for entry in self.entries:
             if entry.chance < 100 and random.randint(1, 100) > entry.chance:
                 continue
 
             amount = random.randint(*entry.amount) + int(entry.scale_amount * player_count)
-            for _ in range(amount):
-                mob = entry.spawn()
-                mob.scale_to_level(highest_level)
-                mob.location = location
-                group.append(mob)
+            prototype_amounts.append((entry.prototype, amount))
+
+        if virtual:
+            group = BaseMob.roll_group(prototype_amounts, level=highest_level, tags=(ENCOUNTER_MOB_TAG,))
+            location.add_virtual_mobs(group)
+        else:
+            group = BaseMob.spawn_group(
+                prototype_amounts, level=highest_level, location=location, tags=(ENCOUNTER_MOB_TAG,)
+            )
 
         location.msg_contents(f"You run into {self.name}!")
 
@@ -1,20 +1,48 @@
+import time
 from typing import Self
 
 from django.core.exceptions import ObjectDoesNotExist
 
 from evennia.typeclasses.attributes import AttributeProperty
 from evennia.utils import logger
+from evennia.utils.search import search_object_by_tag
+from evennia.utils.utils import delay
 from typeclasses.scripts import Script
-from world.encounters.data import ENCOUNTERS
+from world.encounters.data import ENCOUNTER_MOB_TAG, ENCOUNTERS
+from world.overworld.map import OverworldMap
+
+
+def get_grid_cells(width, height, grid_size):
+    """
+    Maps every column and row of the map to the column and row of the encounter grid containing it.
+
+    Args:
+        width (int): Width of the map.
+        height (int): Height of the map.
+        grid_size (int): Amount of cells on each side of the encounter grid.
+
+    Returns:
+        tuple: `(cell_xs, cell_ys)`, the grid column of each map column and the grid row of each map row.
+    """
+    cell_xs = tuple(x * grid_size // width for x in range(width))
+    cell_ys = tuple(y * grid_size // height for y in range(height))
+
+    return cell_xs, cell_ys
 
 
 class EncounterScript(Script):
-    ENCOUNTER_MAX = 49  # The overworld map is about 5280 tiles, 49 gives us a grid of 7 by 7
+    GRID_SIZE = 7
+    ENCOUNTER_MAX = GRID_SIZE * GRID_SIZE  # The overworld map is about 5280 tiles, 49 gives us a grid of 7 by 7
     REPOP_DELAY = 43200  # A day is 86400 seconds divided by 2 for the default game time 2x speed
     REPOP_MAX = 12  # This will make our encounters take a few days to max out
+    VIRTUAL_MOBS = True  # Mobs are only created once players engage them
 
     encounter_data = AttributeProperty()
 
+    _CELL_XS, _CELL_YS = get_grid_cells(OverworldMap.WIDTH, OverworldMap.HEIGHT, GRID_SIZE)
+    # Encounters waiting to be spawned on the next reactor tick
+    _spawn_queue = []
+
     @classmethod
     def get(cls) -> Self:
         try:
@@ -46,7 +74,8 @@ class EncounterScript(Script):
             self.add_encounters(amount_needed)
 
     def add_encounters(self, amount):
-        encounter_grid = [[None for _ in range(7)] for _ in range(7)]
+        grid_size = self.GRID_SIZE
+        encounter_grid = [[None for _ in range(grid_size)] for _ in range(grid_size)]
         for grid_tuple, encounter in self.encounter_data.items():
             grid_x, grid_y = grid_tuple
             encounter_grid[grid_y][grid_x] = encounter
@@ -64,8 +93,10 @@ class EncounterScript(Script):
                     return
 
     def add_encounter(self, grid_x, grid_y) -> dict:
-        near_border = grid_x <= 1 or grid_x >= 6 or grid_y <= 1 or grid_y >= 6
-        near_center = abs(3 - grid_x) <= 2 or abs(3 - grid_y) <= 2
+        last_cell = self.GRID_SIZE - 1
+        center = self.GRID_SIZE // 2
+        near_border = grid_x <= 1 or grid_x >= last_cell or grid_y <= 1 or grid_y >= last_cell
+        near_center = abs(center - grid_x) <= 2 or abs(center - grid_y) <= 2
         if near_border:
             encounter_level = 3
         elif near_center:
@@ -80,23 +111,140 @@ class EncounterScript(Script):
         if not encounter_data:
             return
 
-        chosen_tuple = None
-        chosen_encounter = None
-        for grid_tuple, encounter in self.encounter_data.items():
-            grid_x, grid_y = grid_tuple
-            left = grid_x * 100
-            right = left + 100
-            top = grid_y * 100
-            bottom = grid_y + 100
-            if left < map_x < right and top < map_y < bottom:
-                chosen_encounter = encounter
-                chosen_tuple = grid_tuple
-                break
-
-        if chosen_tuple:
-            players = [char for char in location.contents_get(content_type="character") if char.is_pc]
-            self.encounter_data.pop(chosen_tuple)
+        if not (0 <= map_x < OverworldMap.WIDTH and 0 <= map_y < OverworldMap.HEIGHT):
+            return
+
+        chosen_tuple = (self._CELL_XS[map_x], self._CELL_YS[map_y])
+        chosen_encounter = encounter_data.get(chosen_tuple)
+        if chosen_encounter:
+            encounter_data.pop(chosen_tuple)
             for encounter_type in ENCOUNTERS.values():
                 if chosen_encounter["encounter_level"] >= encounter_type.encounter_level:
-                    mobs = encounter_type.spawn(location, players=players)
-                    return mobs
+                    self.queue_spawn(encounter_type, location, (map_x, map_y), chosen_tuple, chosen_encounter)
+                    return encounter_type
+
+    def queue_spawn(self, encounter_type, location, coordinates, grid_tuple, encounter):
+        """
+        Queues an encounter to be spawned on the next reactor tick, so that
+        spawning the mobs is not part of the movement that triggered it.
+
+        Args:
+            encounter_type (EncounterType): The encounter to spawn.
+            location (Room): Where to spawn it.
+            coordinates (tuple): The map coordinates of the location when it was triggered.
+            grid_tuple (tuple): The grid cell the encounter was taken from.
+            encounter (dict): The encounter data, put back in its cell if nobody is left to ambush.
+        """
+        queue = EncounterScript._spawn_queue
+        if not queue:
+            delay(0, self.spawn_queued)
+
+        queue.append((encounter_type, location, coordinates, grid_tuple, encounter))
+
+    def spawn_queued(self):
+        """
+        Spawns every encounter queued since the last tick.
+        """
+        queue = EncounterScript._spawn_queue[:]
+        EncounterScript._spawn_queue.clear()
+
+        for encounter_type, location, coordinates, grid_tuple, encounter in queue:
+            try:
+                players = []
+                if getattr(location, "coordinates", coordinates) == coordinates:
+                    players = [char for char in location.contents_get(content_type="character") if char.is_pc]
+
+                if not players:
+                    # Everyone left before the ambush, the encounter stays available
+                    self.encounter_data[grid_tuple] = encounter
+                    continue
+
+                encounter_type.spawn(location, players=players, virtual=self.VIRTUAL_MOBS)
+            except Exception:
+                logger.log_trace(f"Could not spawn encounter {encounter_type.key}.")
+
+
+class EncounterSweeperScript(Script):
+    """
+    Deletes the mobs spawned by encounters that nobody has been around for a while.
+    """
+    SWEEP_DELAY = 60
+    IDLE_DELAY = 600  # Seconds without any player around before a mob is deleted
+    SWEEP_MAX = 50  # Maximum amount of mobs deleted per sweep
+
+    @classmethod
+    def get(cls) -> Self:
+        try:
+            script = EncounterSweeperScript.objects.get(db_key="encounter_sweeper_script")
+        except ObjectDoesNotExist:
+            logger.info("Creating new instance of Encounter Sweeper script...")
+            script = EncounterSweeperScript.create(
+                key="encounter_sweeper_script",
+                interval=cls.SWEEP_DELAY,
+                persistent=True,
+                autostart=True,
+            )
+
+        return script
+
+    def at_script_creation(self):
+        self.key = "encounter_sweeper_script"
+        self.interval = self.SWEEP_DELAY
+        self.persistent = True
+
+    def at_repeat(self, **kwargs):
+        self.sweep()
+
+    def sweep(self):
+        """
+        Deletes up to SWEEP_MAX encounter mobs that had no player around for IDLE_DELAY seconds.
+
+        Returns:
+            dict: The statistics of this sweep, also available through `get_stats`.
+        """
+        now = time.time()
+        key, category = ENCOUNTER_MOB_TAG
+        checked = 0
+        idle_mobs = []
+        for mob in search_object_by_tag(key=key, category=category):
+            checked += 1
+            location = mob.location
+            if mob.combat or (location and any(
+                char.is_pc for char in location.contents_get(content_type="character")
+            )):
+                mob.ndb.encounter_last_seen = now
+                continue
+
+            last_seen = mob.ndb.encounter_last_seen
+            if last_seen is None:
+                # The timer starts over after a reload
+                mob.ndb.encounter_last_seen = now
+            elif now - last_seen >= self.IDLE_DELAY and len(idle_mobs) < self.SWEEP_MAX:
+                idle_mobs.append(mob)
+
+        deleted = 0
+        for mob in idle_mobs:
+            try:
+                for item in mob.equipment.all(only_objs=True):
+                    item.delete()
+                mob.delete()
+                deleted += 1
+            except Exception:
+                logger.log_trace(f"Could not sweep encounter mob {mob}.")
+
+        self.ndb.total_deleted = (self.ndb.total_deleted or 0) + deleted
+        self.ndb.last_sweep = {"checked": checked, "idle": len(idle_mobs), "deleted": deleted}
+        if deleted:
+            logger.info(f"Encounter sweeper deleted {deleted} of {checked} encounter mobs.")
+
+        return self.ndb.last_sweep
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: The statistics of the last sweep and the total of deleted mobs since the last reload.
+        """
+        return {
+            **(self.ndb.last_sweep or {"checked": 0, "idle": 0, "deleted": 0}),
+            "total_deleted": self.ndb.total_deleted or 0,
+        }
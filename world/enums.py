@@ -64,3 +64,26 @@ class AttackType(IntEnum):
     RANGED = 2
     THROWN = 3
     MAGIC = 4
+
+
+class CombatMove(Enum):
+    """
+    Movement actions which can be queued in combat, next to attacks
+    """
+    APPROACH = "approach"
+    RETREAT = "retreat"
+
+
+class CombatEvent(IntEnum):
+    """
+    Kinds of events recorded in combat logs, see `world.combat_log`
+    """
+    JOIN = 1
+    LEAVE = 2
+    ATTACK = 3
+    HIT = 4
+    BLOCK = 5
+    DODGE = 6
+    ABSORB = 7
+    MOVE = 8
+    DEFEAT = 9
@@ -57,6 +57,10 @@ class EquipmentHandler:
         """
         self.obj.attributes.add(self.save_attribute, self.slots, category="inventory")
 
+        # combat keeps a snapshot of the equipment
+        if combat := getattr(self.obj, "combat", None):
+            combat.invalidate_stats(self.obj)
+
     def count_slots(self):
         """
         Count slot usage. This is fetched from the .size Attribute of the
@@ -141,6 +141,10 @@ class LevelsHandler:
             setattr(self.obj, stat, stat_value + 1)
             added_stats.add(stat)
 
+        # combat keeps a snapshot of the stats
+        if added_stats and (combat := getattr(self.obj, "combat", None)):
+            combat.invalidate_stats(self.obj)
+
         # Send the player a nice message.
         if is_pc:
             hp_gain_str = f"{added_hp} hp" if added_hp else ""
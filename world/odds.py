@@ -0,0 +1,264 @@
+"""
+Exact odds
+
+Builds the exact probability distributions of the game's rolls by convolution, instead of
+estimating them by rolling thousands of times: d20 saving throws with advantage or
+disadvantage, the attack and dodge rolls of `CombatRules.roll` and weapon damage. Results
+are cached per parameters, so asking twice is a dictionary lookup.
+
+    from world.odds import saving_throw_chance, combat_hit_chance
+
+    saving_throw_chance(bonus=2, advantage=True)  # 0.5775
+    combat_hit_chance(attack_stat=2, defense_stat=1)
+
+"""
+
+from functools import lru_cache
+from itertools import product
+
+import numpy as np
+
+from .dice import parse_dice
+
+# the most outcomes enumerated to work out a roll keeping only some of its dice
+MAX_KEEP_OUTCOMES = 10**6
+
+
+class Distribution:
+    """
+    Probability distribution of an integer roll, `pmf[i]` being the probability of
+    rolling `offset + i`. Distributions are immutable, so they can be cached and shared.
+
+    Adding two distributions gives the distribution of the sum of both rolls, adding an
+    int shifts the distribution, subtracting gives the distribution of the difference.
+    """
+    __slots__ = ("offset", "pmf")
+
+    def __init__(self, offset: int, pmf):
+        pmf = np.asarray(pmf, dtype=float)
+        # trim impossible values at both ends
+        possible = np.flatnonzero(pmf)
+        if len(possible):
+            offset += int(possible[0])
+            pmf = pmf[possible[0]:possible[-1] + 1]
+
+        pmf.flags.writeable = False
+        self.offset = offset
+        self.pmf = pmf
+
+    @classmethod
+    def uniform(cls, low: int, high: int) -> 'Distribution':
+        """
+        Every value from low to high included, equally likely.
+        """
+        return cls(low, np.full(high - low + 1, 1 / (high - low + 1)))
+
+    @classmethod
+    def from_outcomes(cls, outcomes: dict) -> 'Distribution':
+        """
+        Build a distribution from a dict of value: probability.
+        """
+        low = min(outcomes)
+        pmf = np.zeros(max(outcomes) - low + 1)
+        for value, probability in outcomes.items():
+            pmf[value - low] += probability
+        return cls(low, pmf)
+
+    def __repr__(self):
+        return f"<Distribution {self.minimum}..{self.maximum} mean={self.mean:.3f}>"
+
+    @property
+    def minimum(self) -> int:
+        return self.offset
+
+    @property
+    def maximum(self) -> int:
+        return self.offset + len(self.pmf) - 1
+
+    @property
+    def values(self) -> np.ndarray:
+        return np.arange(self.offset, self.offset + len(self.pmf))
+
+    @property
+    def mean(self) -> float:
+        return float(self.values @ self.pmf)
+
+    def __add__(self, other):
+        if isinstance(other, Distribution):
+            return Distribution(self.offset + other.offset, np.convolve(self.pmf, other.pmf))
+        return Distribution(self.offset + other, self.pmf)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return Distribution(-self.maximum, self.pmf[::-1])
+
+    def __sub__(self, other):
+        return self + -other
+
+    def chance_at_least(self, value: int) -> float:
+        """
+        Probability of rolling value or more.
+        """
+        index = value - self.offset
+        if index <= 0:
+            return 1.0
+        return float(self.pmf[index:].sum())
+
+    def chance_above(self, value: int) -> float:
+        """
+        Probability of rolling more than value.
+        """
+        return self.chance_at_least(value + 1)
+
+    def map(self, function) -> 'Distribution':
+        """
+        Distribution of `function(roll)`, for rules which aren't plain sums.
+        """
+        outcomes = {}
+        for value, probability in zip(self.values.tolist(), self.pmf.tolist()):
+            if probability:
+                mapped = function(value)
+                outcomes[mapped] = outcomes.get(mapped, 0) + probability
+        return Distribution.from_outcomes(outcomes)
+
+
+@lru_cache(maxsize=256)
+def dice_distribution(roll_string: str) -> Distribution:
+    """
+    Exact distribution of a dice string as rolled by `DiceRollEngine.roll`, like "2d6+3",
+    "2d20kh1" or "4d6kh3".
+
+    Raises:
+        TypeError: If the roll string is invalid.
+        ValueError: If it keeps some of too many dice to work out.
+    """
+    expression = parse_dice(roll_string)
+    number, size, keep = expression.number, expression.size, expression.keep
+    die = Distribution.uniform(1, size)
+
+    if not keep or abs(keep) == number:
+        total = die
+        for _ in range(number - 1):
+            total += die
+    elif abs(keep) == 1:
+        # highest or lowest die: P(highest <= k) = (k / size) ** number
+        faces = np.arange(size + 1) / size
+        at_most = faces ** number if keep > 0 else 1 - (1 - faces) ** number
+        total = Distribution(1, np.diff(at_most))
+    else:
+        if size ** number > MAX_KEEP_OUTCOMES:
+            raise ValueError(f"Too many outcomes to work out the odds of '{roll_string}'.")
+        outcomes = {}
+        chance = 1 / size ** number
+        for dice in product(range(1, size + 1), repeat=number):
+            dice = sorted(dice, reverse=keep > 0)
+            kept = sum(dice[:abs(keep)])
+            outcomes[kept] = outcomes.get(kept, 0) + chance
+        total = Distribution.from_outcomes(outcomes)
+
+    return total + expression.modifier
+
+
+def _d20(advantage: bool, disadvantage: bool) -> Distribution:
+    if advantage == disadvantage:
+        return dice_distribution("1d20")
+    return dice_distribution("2d20kh1" if advantage else "2d20kl1")
+
+
+@lru_cache(maxsize=1024)
+def saving_throw_chance(bonus: int, target: int = 15, advantage=False, disadvantage=False, modifier=0) -> float:
+    """
+    Chance to pass `DiceRollEngine.saving_throw`, d20 + bonus + modifier > target.
+
+    Args:
+        bonus (int): The ability bonus of the one saving.
+        target (int, optional): The value to beat.
+        advantage (bool, optional): Roll 2d20 and use the bigger number.
+        disadvantage (bool, optional): Roll 2d20 and use the smaller number.
+        modifier (int, optional): An additional +/- modifier to the roll.
+
+    Returns:
+        float: The probability of passing.
+    """
+    return _d20(advantage, disadvantage).chance_above(target - bonus - modifier)
+
+
+def opposed_saving_throw_chance(
+    attack_bonus: int, defense_bonus: int, advantage=False, disadvantage=False, modifier=0
+) -> float:
+    """
+    Chance to win `DiceRollEngine.opposed_saving_throw`, where the defense is its bonus + 10.
+    """
+    return saving_throw_chance(attack_bonus, defense_bonus + 10, advantage, disadvantage, modifier)
+
+
+# `CombatRules.roll` rolls randrange(1, 6) twice, so 2d5
+COMBAT_DICE = Distribution.uniform(1, 5) + Distribution.uniform(1, 5)
+
+
+def _aggro_modifier(aggro: str, is_dodge: bool) -> int:
+    # as in CombatRules.roll
+    if aggro == "aggressive":
+        return -1 if is_dodge else 1
+    if aggro == "defensive":
+        return 1 if is_dodge else -1
+    return 0
+
+
+@lru_cache(maxsize=1024)
+def combat_roll_distribution(stat: int, aggro: str = "n", is_dodge: bool = False) -> Distribution:
+    """
+    Distribution of `CombatRules.roll`, without bonuses against a given target.
+    """
+    return COMBAT_DICE + stat + _aggro_modifier(aggro, is_dodge)
+
+
+@lru_cache(maxsize=1024)
+def combat_hit_chance(attack_stat: int, defense_stat: int, attacker_aggro: str = "n", defender_aggro: str = "n") -> float:
+    """
+    Chance of a melee attack to land, attack roll >= dodge roll, before shields and parries.
+
+    Args:
+        attack_stat (int): Strength of the attacker.
+        defense_stat (int): Cunning of the target.
+        attacker_aggro (str, optional): Aggression of the attacker.
+        defender_aggro (str, optional): Aggression of the target.
+    """
+    margin = (
+        combat_roll_distribution(attack_stat, attacker_aggro)
+        - combat_roll_distribution(defense_stat, defender_aggro, is_dodge=True)
+    )
+    return margin.chance_at_least(0)
+
+
+@lru_cache(maxsize=1024)
+def damage_distribution(min_damage: int, max_damage: int, bonus: int = 0, aggro: str = "n", armor: int = 0) -> Distribution:
+    """
+    Distribution of the damage of an attack which landed, as dealt by `CombatHandler`:
+    randrange(min_damage, max_damage) + bonus, scaled by aggression, minus armor. Attacks
+    the armor stops count as 0 damage.
+
+    Args:
+        min_damage (int): Minimum damage of the weapon.
+        max_damage (int): Maximum damage of the weapon, excluded as in `randrange`.
+        bonus (int, optional): Added to the damage, the strength or cunning of the attacker.
+        aggro (str, optional): Aggression of the attacker.
+        armor (int, optional): Armor of the target.
+    """
+    def scale(damage):
+        if aggro == "defensive":
+            damage = int(damage / 2)
+        elif aggro == "aggressive":
+            damage = int(damage * 1.5)
+        return max(0, damage - armor)
+
+    return (Distribution.uniform(min_damage, max(min_damage, max_damage - 1)) + bonus).map(scale)
+
+
+@lru_cache(maxsize=1024)
+def expected_damage(min_damage: int, max_damage: int, bonus: int = 0, aggro: str = "n", armor: int = 0) -> float:
+    """
+    Average damage of an attack which landed, see `damage_distribution`.
+    """
+    return damage_distribution(min_damage, max_damage, bonus, aggro, armor).mean
@@ -19,6 +19,7 @@ class OverworldLandmarks:
     """ Simple class acting as repository for the landmarks """
 
     _cached_dict = None
+    _cached_coordinates_dict = None
 
     Whiterock_Kingdom = Landmark(
         key="whiterock_kingdom",
@@ -250,7 +251,10 @@ class OverworldLandmarks:
 
     @classmethod
     def get_by_coordinates(cls, coordinates):
-        return next(
-            (val for val in cls._get_cached_dict().values()
-             if val.coordinates == coordinates), None
-        )
+        if not cls._cached_coordinates_dict:
+            new_dict = {}
+            for value in cls._get_cached_dict().values():
+                new_dict.setdefault(value.coordinates, value)
+            cls._cached_coordinates_dict = new_dict
+
+        return cls._cached_coordinates_dict.get(coordinates)
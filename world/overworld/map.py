@@ -1,4 +1,6 @@
 import logging
+from array import array
+from functools import lru_cache
 
 from world.overworld.landmarks import OverworldLandmarks
 from world.overworld.tiles import OverworldTiles
@@ -73,6 +75,9 @@ MAP_ASCII = """\
 ≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈≈\
 """
 
+# Amount of rendered viewports kept in memory, the whole map is about 5360 positions
+RECT_DISPLAY_CACHE_SIZE = 2048
+
 
 def get_map_legend():
     overworld_tiles = OverworldTiles.values()
@@ -92,6 +97,85 @@ def get_landmarks():
     return {landmark.coordinates: landmark for landmark in OverworldLandmarks.values()}
 
 
+def compile_tile_grid(split_map, map_legend):
+    """
+    Compile the ascii map into a flat array of tile ids.
+
+    Multi-character symbols such as `[∆]` are matched as a whole and every cell they
+    cover is resolved to the same tile, so lookups never have to inspect neighbours.
+
+    Args:
+        split_map (list[str]): The rows of the ascii map, top row first.
+        map_legend (dict): Mapping of symbols to their Tile.
+
+    Returns:
+        tuple: `(tiles, grid)` where `tiles` is a tuple of Tile indexed by tile id
+            (id 0 is reserved for unknown symbols) and `grid` is an `array` of tile ids
+            indexed by `row * width + column`.
+    """
+    width = len(split_map[0])
+    tiles = [None]
+    tile_ids = {}
+    for tile in map_legend.values():
+        if tile not in tile_ids:
+            tile_ids[tile] = len(tiles)
+            tiles.append(tile)
+
+    multi_char_symbols = sorted(
+        (symbol for symbol in map_legend if len(symbol) > 1), key=len, reverse=True
+    )
+    grid = array("H", bytes(2 * width * len(split_map)))
+    for y, row in enumerate(split_map):
+        offset = y * width
+        x = 0
+        while x < len(row):
+            symbol = next((_symbol for _symbol in multi_char_symbols if row.startswith(_symbol, x)), None)
+            if symbol:
+                tile_id = tile_ids[map_legend[symbol]]
+                for cell in range(x, min(x + len(symbol), width)):
+                    grid[offset + cell] = tile_id
+                x += len(symbol)
+                continue
+
+            tile = map_legend.get(row[x])
+            if not tile:
+                # Stray fragment of a multi-character symbol, keep the lenient matching
+                tile = next(
+                    (map_legend[_symbol] for _symbol in multi_char_symbols if row[x] in _symbol), None
+                )
+
+            if x < width:
+                grid[offset + x] = tile_ids[tile] if tile else 0
+            x += 1
+
+    return tuple(tiles), grid
+
+
+def compile_location_grid(tiles, tile_grid, landmarks, width):
+    """
+    Overlay the landmarks on top of a compiled tile grid.
+
+    Args:
+        tiles (tuple): The tiles indexed by tile id, as returned by `compile_tile_grid`.
+        tile_grid (array): The compiled tile grid.
+        landmarks (dict): Mapping of map coordinates (column, row) to Landmark.
+        width (int): The width of the map.
+
+    Returns:
+        tuple: `(locations, grid)` where `locations` starts with the same entries as `tiles`
+            followed by the landmarks, and `grid` holds location ids.
+    """
+    locations = list(tiles)
+    grid = array("H", tile_grid)
+    height = len(grid) // width
+    for (x, y), landmark in landmarks.items():
+        if 0 <= x < width and 0 <= y < height:
+            grid[y * width + x] = len(locations)
+            locations.append(landmark)
+
+    return tuple(locations), grid
+
+
 class OverworldMap:
     _split_map = MAP_ASCII.splitlines()
 
@@ -100,7 +184,8 @@ class OverworldMap:
     WIDTH = len(_split_map[0])
     HEIGHT = len(_split_map)
 
-    _multi_char_tile_symbols = {symbol: tile for symbol, tile in MAP_LEGEND.items() if len(symbol) > 1}
+    _tiles, _tile_grid = compile_tile_grid(_split_map, MAP_LEGEND)
+    _locations, _location_grid = compile_location_grid(_tiles, _tile_grid, LANDMARKS, WIDTH)
 
     @classmethod
     def get_landmark(cls, coordinates):
@@ -113,35 +198,27 @@ class OverworldMap:
 
     @classmethod
     def get_tile(cls, coordinates):
-        world_x, world_y = coordinates
-        world_y = cls._invert_origin_y(world_y, 1)
-        if world_y < 0 or world_y >= cls.HEIGHT:
+        index = cls._get_index(coordinates)
+        if index is None:
             return None
 
-        symbol = cls._split_map[world_y][world_x]
-        tile = cls.MAP_LEGEND.get(symbol)
-        if not tile:
-            tile = next(
-                (
-                    _tile for _symbol, _tile in cls._multi_char_tile_symbols.items()
-                    if symbol in _symbol
-                ), None
-            )
-
+        tile = cls._tiles[cls._tile_grid[index]]
         if not tile:
-            logging.error(f"There are no known tile for coordinates {coordinates} and symbol {symbol}.")
+            logging.error(f"There are no known tile for coordinates {coordinates}.")
 
         return tile
 
     @classmethod
     def get(cls, coordinates):
-        landmark = cls.get_landmark(coordinates)
-        if landmark:
-            return landmark
+        index = cls._get_index(coordinates)
+        if index is None:
+            return None
 
-        tile = cls.get_tile(coordinates)
+        location = cls._locations[cls._location_grid[index]]
+        if not location:
+            logging.error(f"There are no known tile for coordinates {coordinates}.")
 
-        return tile
+        return location
 
     @classmethod
     def get_rect_symbols(cls, world_x, world_y, width, height):
@@ -168,6 +245,30 @@ class OverworldMap:
 
         return symbols
 
+    @classmethod
+    @lru_cache(maxsize=RECT_DISPLAY_CACHE_SIZE)
+    def get_rect_display(cls, world_x, world_y, width, height):
+        """
+        Return the rectangle as a single string, rows separated by newlines.
+        Results are cached by rectangle so identical viewports are only built once.
+        """
+        symbols = cls.get_rect_symbols(world_x, world_y, width, height)
+
+        return "\n".join("".join(row) for row in symbols)
+
+    @classmethod
+    def _get_index(cls, coordinates):
+        """
+        Returns the index of the coordinates inside the compiled grids,
+        or None if they are outside the map.
+        """
+        world_x, world_y = coordinates
+        world_y = cls._invert_origin_y(world_y, 1)
+        if world_y < 0 or world_y >= cls.HEIGHT or world_x < 0 or world_x >= cls.WIDTH:
+            return None
+
+        return world_y * cls.WIDTH + world_x
+
     @classmethod
     def _invert_origin_y(cls, world_y, height):
         """
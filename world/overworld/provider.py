@@ -1,8 +1,11 @@
 import logging
 import random
 
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from evennia.contrib.grid import wilderness
+from evennia.objects.models import ObjectDB
 from evennia.prototypes.prototypes import search_prototype
+from evennia.typeclasses.attributes import Attribute
 from evennia.utils.create import create_object
 from evennia.utils.search import search_object_by_tag
 from world.overworld import map
@@ -10,8 +13,15 @@ from world.overworld.landmarks import OverworldLandmarks
 
 logger = logging.getLogger()
 
+# Tags of the rooms landmark exits can lead to, see `get_landmark_exits`
+AREA_TAG_CATEGORIES = ("area_def", "area_id")
+
 
 class OverworldMapProvider(wilderness.WildernessMapProvider):
+    # The provider instance is stored on the Overworld script, so the caches live on the class
+    _room_desc_cache = {}
+    _landmark_exits_cache = {}
+
     def is_valid_coordinates(self, wilderness, coordinates):
         """Returns True if coordinates is valid and can be walked to.
 
@@ -70,13 +80,7 @@ class OverworldMapProvider(wilderness.WildernessMapProvider):
         """
 
         location = map.OverworldMap.get(coordinates)
-        prototype_name = location.room_prototype
-        try:
-            room_prototype = search_prototype(prototype_name, require_single=True)[0]
-            desc = room_prototype.get('desc', '')
-        except KeyError:
-            logger.error(f"No room prototype found with name {prototype_name} for overworld coordinates {coordinates}")
-            desc = "Unknown"
+        desc = self.get_room_desc(location.room_prototype, coordinates)
 
         landmark = OverworldLandmarks.get_by_coordinates(coordinates)
         landmark_exit = next((re for re in room.exits if re.key == "enter"), None)
@@ -90,9 +94,7 @@ class OverworldMapProvider(wilderness.WildernessMapProvider):
                         location=room,
                     )
 
-
-            # To search multiple tags at once, we need to regroup tags into ordered keys and categories
-            possible_exits = search_object_by_tag([landmark.key, 'area_exit'], ['area_id', 'area_def'])
+            possible_exits = self.get_landmark_exits(landmark)
             if possible_exits:
                 possible_exit = random.choice(possible_exits)
                 landmark_exit.destination = possible_exit
@@ -103,6 +105,60 @@ class OverworldMapProvider(wilderness.WildernessMapProvider):
 
         room.db.desc = desc
 
+    @classmethod
+    def get_room_desc(cls, prototype_name, coordinates=None):
+        """
+        Returns the desc of a room prototype, searching the prototypes only once per name.
+
+        Args:
+            prototype_name (str): The key of the room prototype.
+            coordinates (tuple, optional): Only used to report a missing prototype.
+
+        Returns:
+            desc (str)
+        """
+        desc = cls._room_desc_cache.get(prototype_name)
+        if desc is None:
+            try:
+                room_prototype = search_prototype(prototype_name, require_single=True)[0]
+                desc = room_prototype.get('desc', '')
+            except KeyError:
+                logger.error(f"No room prototype found with name {prototype_name} for overworld coordinates {coordinates}")
+                desc = "Unknown"
+
+            cls._room_desc_cache[prototype_name] = desc
+
+        return desc
+
+    @classmethod
+    def get_landmark_exits(cls, landmark):
+        """
+        Returns the area rooms a landmark's exit can lead to, searching the tags only once per landmark.
+
+        Args:
+            landmark (Landmark): The landmark to find area exits for.
+
+        Returns:
+            list: The rooms tagged as exits of the landmark's area.
+        """
+        possible_exits = cls._landmark_exits_cache.get(landmark.key)
+        if possible_exits is None:
+            # To search multiple tags at once, we need to regroup tags into ordered keys and categories
+            possible_exits = list(search_object_by_tag([landmark.key, 'area_exit'], ['area_id', 'area_def']))
+            cls._landmark_exits_cache[landmark.key] = possible_exits
+
+        return possible_exits
+
+    @classmethod
+    def clear_cache(cls):
+        """
+        Forget the cached room descs and area exits.
+        This must be called when room prototypes change or area exits are created or deleted,
+        `connect_cache_signals` does it for database prototypes and area tags.
+        """
+        cls._room_desc_cache.clear()
+        cls._landmark_exits_cache.clear()
+
     @property
     def room_typeclass(self):
         # This is to avoid Circular Imports between Cmds, Typeclasses and the Provider
@@ -116,3 +172,35 @@ class OverworldMapProvider(wilderness.WildernessMapProvider):
         from typeclasses.exits import OverworldExit
 
         return OverworldExit
+
+
+def _at_prototype_change(sender, instance, **kwargs):
+    # Database prototypes are stored in the "prototype" attribute of a DbPrototype script
+    if instance.db_key == "prototype":
+        OverworldMapProvider.clear_cache()
+
+
+def _at_object_tags_change(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if reverse:
+        # A tag was given to or taken from objects
+        changed = action in ("post_add", "post_remove", "pre_clear") and instance.db_category in AREA_TAG_CATEGORIES
+    elif action in ("post_add", "post_remove"):
+        changed = model.objects.filter(pk__in=pk_set, db_category__in=AREA_TAG_CATEGORIES).exists()
+    elif action == "pre_clear":
+        changed = instance.db_tags.filter(db_category__in=AREA_TAG_CATEGORIES).exists()
+    else:
+        changed = False
+
+    if changed:
+        OverworldMapProvider.clear_cache()
+
+
+def connect_cache_signals():
+    """
+    Clear the provider caches whenever a database prototype is saved or deleted, or area
+    tags are added to or removed from an object. Module prototypes only change on a
+    reload, which starts with empty caches.
+    """
+    post_save.connect(_at_prototype_change, sender=Attribute, dispatch_uid="overworld_prototype_save")
+    post_delete.connect(_at_prototype_change, sender=Attribute, dispatch_uid="overworld_prototype_delete")
+    m2m_changed.connect(_at_object_tags_change, sender=ObjectDB.db_tags.through, dispatch_uid="overworld_area_tags")
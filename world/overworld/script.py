@@ -2,6 +2,8 @@
 from evennia import create_script
 from evennia.contrib.grid import wilderness
 from evennia.utils import logger
+from evennia.utils.create import create_object
+from evennia.utils.utils import delay
 from world.overworld.provider import OverworldMapProvider
 
 
@@ -9,6 +11,21 @@ class Overworld(wilderness.WildernessScript):
     _INSTANCE = None
     _NAME = "overworld"
 
+    ROOM_POOL_SIZE = 30  # Unused rooms kept ready, each one is a room and its 8 exits
+    ROOM_POOL_REFILL_THRESHOLD = 10  # Refilling starts when fewer unused rooms are left
+    ROOM_POOL_BATCH_SIZE = 2  # Rooms created per reactor tick while refilling
+
+    _EXITS = (
+        ("north", "n"),
+        ("northeast", "ne"),
+        ("east", "e"),
+        ("southeast", "se"),
+        ("south", "s"),
+        ("southwest", "sw"),
+        ("west", "w"),
+        ("northwest", "nw"),
+    )
+
     @classmethod
     def get_instance(cls):
         if cls._INSTANCE:
@@ -73,3 +90,82 @@ class Overworld(wilderness.WildernessScript):
         script.start()
 
         return script
+
+    def _create_room(self, coordinates, report_to):
+        """
+        Counts pool hits and misses before letting the wilderness pick an unused room
+        or create a new one, then makes sure the pool gets refilled.
+        """
+        if self.db.unused_rooms:
+            self.ndb.room_pool_hits = (self.ndb.room_pool_hits or 0) + 1
+        else:
+            self.ndb.room_pool_misses = (self.ndb.room_pool_misses or 0) + 1
+
+        room = super()._create_room(coordinates, report_to)
+        self.refill_room_pool()
+
+        return room
+
+    def refill_room_pool(self, force=False):
+        """
+        Schedules the creation of unused rooms in the background, a few per reactor tick,
+        until the pool is full again.
+
+        Args:
+            force (bool, optional): Refill even if the pool is above the refill threshold.
+        """
+        if self.ndb.room_pool_refilling:
+            return
+
+        if self.db.unused_rooms is None:
+            self.db.unused_rooms = []
+
+        if not force and len(self.db.unused_rooms) >= self.ROOM_POOL_REFILL_THRESHOLD:
+            return
+
+        self.ndb.room_pool_refilling = True
+        delay(0, self._refill_room_pool_batch)
+
+    def _refill_room_pool_batch(self):
+        unused_rooms = self.db.unused_rooms
+        for _ in range(self.ROOM_POOL_BATCH_SIZE):
+            if len(unused_rooms) >= self.ROOM_POOL_SIZE:
+                self.ndb.room_pool_refilling = False
+                return
+
+            try:
+                unused_rooms.append(self._create_pool_room())
+            except Exception:
+                logger.log_trace("Could not refill the Overworld room pool.")
+                self.ndb.room_pool_refilling = False
+                return
+
+        delay(0, self._refill_room_pool_batch)
+
+    def _create_pool_room(self):
+        """
+        Creates a room with its exits, the same way the wilderness does when it has no unused room.
+        """
+        room = create_object(typeclass=self.mapprovider.room_typeclass, key="Wilderness")
+        for key, alias in self._EXITS:
+            create_object(
+                typeclass=self.mapprovider.exit_typeclass,
+                key=key,
+                aliases=[alias],
+                location=room,
+                destination=room,
+            )
+
+        return room
+
+    def get_room_pool_stats(self):
+        """
+        Returns:
+            dict: The amount of unused rooms in the pool and how often
+                a room could (hits) or could not (misses) be taken from it.
+        """
+        return {
+            "size": len(self.db.unused_rooms or []),
+            "hits": self.ndb.room_pool_hits or 0,
+            "misses": self.ndb.room_pool_misses or 0,
+        }
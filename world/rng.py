@@ -0,0 +1,89 @@
+"""
+Random number streams
+
+Combat and dice rolls can be given their own `RandomStream` instead of using the global
+`random` module, so a fight can be replayed by seeding it again. Streams created
+without a seed take one from a master generator, which a benchmark can seed once with
+`seed_streams` to make every fight it starts reproducible.
+
+"""
+
+import random
+
+_seeds = random.Random()
+
+
+def seed_streams(seed=None):
+    """
+    Seed the generator that seeds every new stream created without a seed.
+
+    Args:
+        seed (int, optional): The seed, None to go back to unpredictable seeds.
+    """
+    _seeds.seed(seed)
+
+
+class RandomStream:
+    """
+    A random number generator with the `random` module functions used by the game.
+
+    With a `block_size`, random numbers are drawn in blocks of that size and integers
+    are scaled from them, which is cheaper per number when many are needed.
+    """
+    __slots__ = ("_random", "block_size", "_block", "_index")
+
+    def __init__(self, seed=None, block_size=0):
+        """
+        Args:
+            seed (int, optional): Seed of the stream, taken from the master generator if not given.
+            block_size (int, optional): Draw random numbers by blocks of this size, 0 to draw them one by one.
+        """
+        self._random = random.Random(_seeds.getrandbits(64) if seed is None else seed)
+        self.block_size = block_size
+        self._block = []
+        self._index = 0
+
+    def seed(self, seed):
+        self._random.seed(seed)
+        self._block = []
+        self._index = 0
+
+    def getrandbits(self, k: int) -> int:
+        """
+        An integer with k random bits, to seed other generators from this stream.
+        """
+        return self._random.getrandbits(k)
+
+    def random(self) -> float:
+        """
+        A float in [0.0, 1.0).
+        """
+        if not self.block_size:
+            return self._random.random()
+
+        index = self._index
+        if index >= len(self._block):
+            rand = self._random.random
+            self._block = [rand() for _ in range(self.block_size)]
+            index = 0
+
+        self._index = index + 1
+        return self._block[index]
+
+    def randrange(self, start: int, stop: int) -> int:
+        """
+        An integer in [start, stop).
+        """
+        if not self.block_size:
+            return self._random.randrange(start, stop)
+
+        if stop <= start:
+            raise ValueError(f"empty range in randrange({start}, {stop})")
+
+        return start + int(self.random() * (stop - start))
+
+    def randint(self, a: int, b: int) -> int:
+        """
+        An integer in [a, b].
+        """
+        return self.randrange(a, b + 1)
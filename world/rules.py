@@ -18,14 +18,124 @@ to use them as the base for your own variation (tweaking values etc).
 This module is designed to use by importing the `dice` singleton provided.
 
 """
-from random import randint
+from random import randint, random
 
+import numpy as np
+
+from .dice import compile_table, parse_dice
 from .enums import Ability
 from .random_tables import death_and_dismemberment as death_table
+from .rng import RandomStream
+
+# numpy generator of the engines without a random stream
+_generator = np.random.default_rng()
 
 # Basic rolls
 
 
+class SavingThrowResult:
+    """
+    Result of a saving throw. The text is only rendered when `txt` is read, so read the
+    outcome from the attributes when the text isn't shown:
+
+        result = dice.saving_throw(character, bonus_type=Ability.CON)
+        if result.passed: ...
+
+    It still unpacks like the `(passed, quality, txt)` tuple saving throws used to return,
+    but unpacking it reads `txt` and so renders the text.
+
+    """
+    __slots__ = (
+        "passed", "quality", "dice_roll", "bonus_type", "bonus", "modifier", "target",
+        "advantage", "disadvantage", "defense_type", "_txt",
+    )
+
+    def __init__(
+        self,
+        passed,
+        quality,
+        dice_roll,
+        bonus_type,
+        bonus,
+        modifier,
+        target,
+        advantage=False,
+        disadvantage=False,
+        defense_type=None,
+    ):
+        self.passed = passed
+        self.quality = quality
+        self.dice_roll = dice_roll
+        self.bonus_type = bonus_type
+        self.bonus = bonus
+        self.modifier = modifier
+        self.target = target
+        self.advantage = advantage
+        self.disadvantage = disadvantage
+        # set for opposed saving throws, the target being the defense
+        self.defense_type = defense_type
+        self._txt = None
+
+    @property
+    def txt(self):
+        """
+        Text detailing the roll, for display purposes.
+        """
+        if self._txt is None:
+            self._txt = self._render()
+        return self._txt
+
+    def _render(self):
+        rolltxt = "d20 "
+        if self.advantage and self.disadvantage:
+            rolltxt = "d20 (advantage canceled by disadvantage)"
+        elif self.advantage:
+            rolltxt = "|g2d20|n (advantage: picking highest) "
+        elif self.disadvantage:
+            rolltxt = "|r2d20|n (disadvantage: picking lowest) "
+        bontxt = f"(+{self.bonus})"
+        modtxt = ""
+        if self.modifier:
+            modtxt = f" + {self.modifier}" if self.modifier > 0 else f" - {abs(self.modifier)}"
+        qualtxt = f" ({self.quality.value}!)" if self.quality else ""
+
+        txt = (
+            f"rolled {self.dice_roll} on {rolltxt} "
+            f"+ {self.bonus_type.value}{bontxt}{modtxt} vs "
+            f"{self.target} -> |w{self.passed}{qualtxt}|n"
+        )
+        if self.defense_type:
+            txt = f"Roll vs {self.defense_type.value}({self.target}):\n{txt}"
+        return txt
+
+    def __iter__(self):
+        yield self.passed
+        yield self.quality
+        yield self.txt
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, index):
+        if index in (0, -3):
+            return self.passed
+        if index in (1, -2):
+            return self.quality
+        return tuple(self)[index]
+
+    def __eq__(self, other):
+        if isinstance(other, SavingThrowResult):
+            other = tuple(other)
+        return tuple(self) == other
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return f"<SavingThrowResult passed={self.passed} roll={self.dice_roll} target={self.target}>"
+
+
+
 class DiceRollEngine:
     """
     This groups all dice rolls for game mechanics. These could all have been normal functions, but we
@@ -33,30 +143,60 @@ class DiceRollEngine:
 
     """
 
+    def __init__(self, rng: RandomStream | None = None):
+        """
+        Args:
+            rng (RandomStream, optional): Stream to roll from, for reproducible rolls.
+                The global `random` module is used without it.
+        """
+        self.rng = rng
+
     def roll(self, roll_string, max_number=10):
         """
-        NOTE: Implement this with the dice roller contrib instead!
+        Roll dice from a string like "1d20", "2d6+3" or "4d6kh3" (keep the 3 highest dice,
+        `kl` keeps the lowest). See `world.dice` for the syntax, strings are only parsed
+        the first time they are rolled.
+
+        Args:
+            roll_string (str): The dice to roll.
+            max_number (int, optional): The most dice allowed.
+
+        Returns:
+            int: The result of the roll.
+
+        Raises:
+            TypeError: If the roll string is invalid.
+
+        """
+        expression = parse_dice(roll_string)
+        if expression.number > max_number:
+            raise TypeError(f"Invalid number of dice rolled (must be between 1 and {max_number})")
+
+        return expression.roll(self.rng.randint if self.rng else randint)
+
+    def roll_many(self, roll_string, amount, max_number=10):
+        """
+        Roll the same dice many times at once, like the morale of a whole group.
+
+        Args:
+            roll_string (str): The dice to roll, as for `roll`.
+            amount (int): How many times to roll them.
+            max_number (int, optional): The most dice allowed in one roll.
+
+        Returns:
+            numpy.ndarray: The result of each roll.
+
+        Raises:
+            TypeError: If the roll string is invalid.
 
         """
-        max_diesize = 1000
-        roll_string = roll_string.lower()
-        if "d" not in roll_string:
-            raise TypeError(
-                f"Dice roll '{roll_string}' was not recognized. Must be `<number>d<dicesize>`."
-            )
-        number, diesize = roll_string.split("d", 1)
-        try:
-            number = int(number)
-            diesize = int(diesize)
-        except Exception:
-            raise TypeError(f"The number and dice-size of '{roll_string}' must be numerical.")
-        if 0 < number > max_number:
+        expression = parse_dice(roll_string)
+        if expression.number > max_number:
             raise TypeError(f"Invalid number of dice rolled (must be between 1 and {max_number})")
-        if 0 < diesize > max_diesize:
-            raise TypeError(f"Invalid die-size used (must be between 1 and {max_diesize} sides)")
 
-        # At this point we know we have valid input - roll and add dice together
-        return sum(randint(1, diesize) for _ in range(number))
+        # a stream seeds a new generator, so its rolls stay reproducible
+        generator = np.random.default_rng(self.rng.getrandbits(64)) if self.rng else _generator
+        return expression.roll_many(generator, amount)
 
     def roll_with_advantage_or_disadvantage(self, advantage=False, disadvantage=False):
         """
@@ -75,9 +215,9 @@ class DiceRollEngine:
             # normal roll, or advantage cancels disadvantage
             return self.roll("1d20")
         elif advantage:
-            return max(self.roll("1d20"), self.roll("1d20"))
+            return self.roll("2d20kh1")
         else:
-            return min(self.roll("1d20"), self.roll("1d20"))
+            return self.roll("2d20kl1")
 
     def saving_throw(
         self,
@@ -103,10 +243,11 @@ class DiceRollEngine:
             modifier (int, optional): An additional +/- modifier to the roll.
 
         Returns:
-            tuple: A tuple `(bool, str, str)`. The bool indicates if the save was passed or not.
-                The second element is the quality of the roll - None (normal),
-                "critical fail" and "critical success". Last element is a text detailing
-                the roll, for display purposes.
+            SavingThrowResult: `passed` indicates if the save was passed or not, `quality` is
+                the quality of the roll - None (normal), "critical fail" and "critical
+                success" - and `txt` a text detailing the roll, for display purposes. Read
+                `passed` and `quality` when the text isn't needed, it is rendered when `txt`
+                is read or the result is unpacked like the old `(passed, quality, txt)` tuple.
         Notes:
             Advantage and disadvantage cancel each other out.
 
@@ -122,30 +263,19 @@ class DiceRollEngine:
             quality = Ability.CRITICAL_SUCCESS
         else:
             quality = None
-        result = dice_roll + bonus + modifier > target
-
-        # determine text output
-        rolltxt = "d20 "
-        if advantage and disadvantage:
-            rolltxt = "d20 (advantage canceled by disadvantage)"
-        elif advantage:
-            rolltxt = "|g2d20|n (advantage: picking highest) "
-        elif disadvantage:
-            rolltxt = "|r2d20|n (disadvantage: picking lowest) "
-        bontxt = f"(+{bonus})"
-        modtxt = ""
-        if modifier:
-            modtxt = f" + {modifier}" if modifier > 0 else f" - {abs(modifier)}"
-        qualtxt = f" ({quality.value}!)" if quality else ""
 
-        txt = (
-            f"rolled {dice_roll} on {rolltxt} "
-            f"+ {bonus_type.value}{bontxt}{modtxt} vs "
-            f"{target} -> |w{result}{qualtxt}|n"
+        return SavingThrowResult(
+            dice_roll + bonus + modifier > target,
+            quality,
+            dice_roll,
+            bonus_type,
+            bonus,
+            modifier,
+            target,
+            advantage=advantage,
+            disadvantage=disadvantage,
         )
 
-        return (dice_roll + bonus + modifier) > target, quality, txt
-
     def opposed_saving_throw(
         self,
         attacker,
@@ -171,9 +301,10 @@ class DiceRollEngine:
             modifier (int): An additional +/- modifier to the roll.
 
         Returns:
-            tuple: (bool, str, str): If the attack succeed or not. The second element is the
-                quality of the roll - None (normal), "critical fail" and "critical success". Last
-                element is a text that summarizes the details of the roll.
+            SavingThrowResult: `passed` is True if the attack succeeded, `quality` the quality
+                of the roll - None (normal), "critical fail" and "critical success" - and `txt`
+                a text summarizing the details of the roll. As for `saving_throw`, read
+                `passed` and `quality` unless the text is shown, unpacking the result renders it.
         Notes:
             Advantage and disadvantage cancel each other out.
 
@@ -181,7 +312,7 @@ class DiceRollEngine:
         # what is stored on the character/npc is the bonus; we add 10 to get the defense target
         defender_defense = getattr(defender, defense_type.value, 1) + 10
 
-        result, quality, txt = self.saving_throw(
+        result = self.saving_throw(
             attacker,
             bonus_type=attack_type,
             target=defender_defense,
@@ -189,9 +320,9 @@ class DiceRollEngine:
             disadvantage=disadvantage,
             modifier=modifier,
         )
-        txt = f"Roll vs {defense_type.value}({defender_defense}):\n{txt}"
+        result.defense_type = defense_type
 
-        return result, quality, txt
+        return result
 
     def roll_random_table(self, dieroll, table_choices):
         """
@@ -212,40 +343,29 @@ class DiceRollEngine:
             `roll table_choices = [('1-5', "Blue"), ('6-9': "Red"), ('10', "Purple")]`
 
         Notes:
-            If the roll is outside of the listing, the closest edge value is used.
+            If the roll is outside of the listing, the closest edge value is used. Tables
+            are compiled the first time they are rolled on, see `world.dice.compile_table`,
+            and must not change afterwards.
 
         """
         roll_result = self.roll(dieroll)
         if not table_choices:
             return None
 
-        if isinstance(table_choices[0], (tuple, list)):
-            # tuple with range conditional, like ('1-5', "Blue") or ('10', "Purple")
-            max_range = -1
-            min_range = 10**6
-            for (valrange, choice) in table_choices:
+        return compile_table(table_choices)[roll_result]
 
-                minval, *maxval = valrange.split("-", 1)
-                minval = abs(int(minval))
-                maxval = abs(int(maxval[0]) if maxval else minval)
+    def sample(self, sampler):
+        """
+        Pick from weighted choices, see `world.dice.AliasSampler`.
 
-                # we store the largest/smallest values so far in case we need to use them
-                max_range = max(max_range, maxval)
-                min_range = min(min_range, minval)
+        Args:
+            sampler (AliasSampler): The choices and their weights.
 
-                if minval <= roll_result <= maxval:
-                    return choice
+        Returns:
+            Any: The choice picked.
 
-            # if we have no result, we are outside of the range, we pick the edge values. It is also
-            # possible the range contains 'gaps', but that'd be an error in the random table itself.
-            if roll_result > max_range:
-                return table_choices[-1][1]
-            else:
-                return table_choices[0][1]
-        else:
-            # regular list - one line per value.
-            roll_result = max(1, min(len(table_choices), roll_result))
-            return table_choices[roll_result - 1]
+        """
+        return sampler.sample(self.rng.random if self.rng else random)
 
     # specific rolls / actions
 
@@ -263,6 +383,27 @@ class DiceRollEngine:
         """
         return self.roll("2d6") <= defender.morale
 
+    def group_morale_check(self, defenders):
+        """
+        Morale checks for a whole group at once, like a goblin pack after one of them fell.
+        Each defender has the same odds as with `morale_check`, but all the 2d6 are rolled
+        in a single draw.
+
+        Args:
+            defenders (iterable): The NPCs/monsters checking their morale.
+
+        Returns:
+            set: The defenders whose morale roll failed, which should rout.
+
+        """
+        defenders = list(defenders)
+        if not defenders:
+            return set()
+
+        morale = np.fromiter((defender.morale for defender in defenders), dtype=int, count=len(defenders))
+        failed = self.roll_many("2d6", len(defenders)) > morale
+        return {defenders[index] for index in np.flatnonzero(failed)}
+
     def heal_from_rest(self, character):
         """
         A meal and a full night's rest allow for regaining 1d8 + Const bonus HP.
@@ -308,6 +449,9 @@ class DiceRollEngine:
                 new_hp = self.roll("1d4")
                 character.heal(new_hp)
                 setattr(character, abi, current_abi)
+                # combat keeps a snapshot of the abilities
+                if combat := getattr(character, "combat", None):
+                    combat.invalidate_stats(character)
 
                 character.msg(
                     "~" * 78 + "\n|yYou survive your brush with death, "